@@ -1,53 +1,22 @@
-import os
 import pathlib
-import re
-import time
+import sys
 
-import requests
 from langchain.agents import create_agent
-from langchain.chat_models import init_chat_model
-from langchain_community.utilities import SQLDatabase
-from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
-from langchain_core.tools import tool
-
-
-from langchain.agents.middleware import PIIMiddleware, SummarizationMiddleware
-
-from langchain_openai import ChatOpenAI
-from langgraph.checkpoint.memory import MemorySaver, InMemorySaver
-from typing import Literal
-from langchain.tools import tool
-
-from typing_extensions import NotRequired
-
-from langchain.tools.tool_node import ToolCallRequest
-from langchain.messages import ToolMessage
-from langgraph.types import Command
-from typing import Callable
-
-from langchain.agents.middleware import wrap_tool_call
-
-from langchain.agents.middleware import (
-    AgentMiddleware,
-    AgentState,
-    ModelRequest,
-    ModelResponse,
-)
-from langgraph.runtime import Runtime
-from typing import Any, Callable
+from langchain_core.messages import HumanMessage, AIMessageChunk, ToolMessage
+from langgraph.checkpoint.memory import InMemorySaver
 
 from rich.console import Console
-from rich.panel import Panel
-from rich.markdown import Markdown
-from rich.status import Status
-from rich.syntax import Syntax
 from rich.theme import Theme
+from rich.live import Live
+from rich.spinner import Spinner
 
 from prompt_toolkit import PromptSession
-from prompt_toolkit.history import FileHistory
+from prompt_toolkit.history import ThreadedHistory
 from prompt_toolkit.formatted_text import HTML
 
 from utils.llm import get_llm
+from utils.console import StreamingMarkdown
+from utils.history import BackgroundFileHistory
 from utils.tools.filesystem import (
     list_files,
     read_file,    
@@ -56,19 +25,6 @@ from utils.tools.filesystem import (
     create_folder,    
     search_text_patterns,
 )
-
-from utils.tools.filesystem import (
-    list_files_in_dir,
-    read_file_content,
-    write_results_file,
-    find_files
-)
-from utils.tools.planning import (
-    write_todos,
-    read_todos,
-    think
-)
-
 from utils.tools.get_web_links import get_web_links
 from utils.tools.get_web_data import get_web_data
 from utils.tools.git_tools import git_command, git_status
@@ -117,35 +73,48 @@ set_memory_references(checkpointer, "conversation_1")
 
 thread_id = "conversation_1"
 
-console.print()
-
-console.print(Panel.fit(
-    "[bold cyan]🤖 AI Assistant Chat Bot[/bold cyan]\n\n"
-    "[dim]Features:[/dim]\n"
-    f"  • Powered by [green]{llm.model_name}[/green]\n"
-    "  • Terminal-like typing effects\n"
-    "  • File operations (find, read, write)\n"
-    "  • Web link search\n"
-    "  • Conversation history\n\n"
-    "[yellow]Commands:[/yellow]\n"
-    "  • [cyan]/clear[/cyan] - Clear all memory and start fresh\n"
-    "  • [cyan]quit/exit/bye[/cyan] - End conversation",
-    border_style="cyan",
-    padding=(1, 2)
-))
-console.print()
+# Parsed once instead of on every prompt
+PROMPT_HTML = HTML('\n<ansigreen><b>You:</b></ansigreen> ')
 
 # Initialize prompt session with persistent history file inside the project folder
 project_root = pathlib.Path(__file__).parent.resolve()
 history_file = project_root / ".chat_history"
 history_file.parent.mkdir(parents=True, exist_ok=True)  # Ensure directory exists
-session = PromptSession(history=FileHistory(str(history_file)))
+# History loads and appends in the background so submitting a prompt never waits on disk
+session = PromptSession(history=ThreadedHistory(BackgroundFileHistory(str(history_file))))
+
+
+def show_banner():
+    """Print the welcome banner. Panel is only imported when the banner is shown."""
+    from rich.panel import Panel
+    
+    console.print()
+    console.print(Panel.fit(
+        "[bold cyan]🤖 AI Assistant Chat Bot[/bold cyan]\n\n"
+        "[dim]Features:[/dim]\n"
+        f"  • Powered by [green]{llm.model_name}[/green]\n"
+        "  • Terminal-like typing effects\n"
+        "  • File operations (find, read, write)\n"
+        "  • Web link search\n"
+        "  • Conversation history\n\n"
+        "[yellow]Commands:[/yellow]\n"
+        "  • [cyan]/clear[/cyan] - Clear all memory and start fresh\n"
+        "  • [cyan]quit/exit/bye[/cyan] - End conversation",
+        border_style="cyan",
+        padding=(1, 2)
+    ))
+    console.print()
+
+
+# Skip the banner for scripted use: python 01.langchainv1-chat-tool.py --no-banner
+if "--no-banner" not in sys.argv:
+    show_banner()
 
 # Chat loop
 while True:
     # Get user input with prompt_toolkit (supports arrow up/down history)
     try:
-        user_input = session.prompt(HTML('\n<ansigreen><b>You:</b></ansigreen> ')).strip()
+        user_input = session.prompt(PROMPT_HTML).strip()
     except (KeyboardInterrupt, EOFError):
         console.print("\n[yellow]👋 Goodbye![/yellow]")
         break
@@ -173,17 +142,28 @@ while True:
     # Create human message
     human_msg = HumanMessage(user_input)
     
-    # Show status while AI is thinking
-    with console.status("[bold cyan]🤖 Thinking...", spinner="dots"):
-        # Invoke agent with thread configuration to maintain history
-        result = agent.invoke(
-            {"messages": [human_msg]},
-            config={"configurable": {"thread_id": thread_id}}
-        )
+    console.print("\n[bold cyan]🤖 Bot:[/bold cyan]")
     
-    # Get and display the AI's response with typing effect
-    ai_response = result["messages"][-1].content
-    console.print("\n[bold cyan]🤖 Bot:[/bold cyan] ", end="")    
-    console.print(Markdown(ai_response))
+    # Stream tokens as they arrive; keep a spinner up until the first token and while tools run
+    ai_response = StreamingMarkdown()
+    with Live(Spinner("dots", text="[bold cyan]🤖 Thinking..."), console=console, refresh_per_second=12) as live:
+        for chunk, metadata in agent.stream(
+            {"messages": [human_msg]},
+            config={"configurable": {"thread_id": thread_id}},
+            stream_mode="messages",
+            # Checkpoints are saved in the background while the next step runs
+            durability="async",
+        ):
+            if isinstance(chunk, ToolMessage):
+                # Tool finished - the model will answer again, so start a fresh buffer
+                ai_response = StreamingMarkdown()
+                live.update(Spinner("dots", text="[bold cyan]🤖 Thinking..."))
+            elif isinstance(chunk, AIMessageChunk):
+                if chunk.tool_call_chunks:
+                    live.update(Spinner("dots", text="[bold yellow]🔧 Running tools..."))
+                elif isinstance(chunk.content, str) and chunk.content:
+                    # Parsed at Live's refresh rate, not once per token
+                    ai_response.append(chunk.content)
+                    live.update(ai_response)
 
 console.print("\n")
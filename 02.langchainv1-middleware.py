@@ -1,27 +1,14 @@
-import pathlib
 import re
-from datetime import datetime
+from pprint import pprint
+from typing import Any
 
-import requests
-from langchain.agents import create_agent
-from langchain.chat_models import init_chat_model
-from langchain_community.utilities import SQLDatabase
-from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
-from langchain_core.tools import tool
-from langchain.agents import create_agent
+from typing_extensions import NotRequired
 
-from langchain_openai import ChatOpenAI
+from langchain.agents import create_agent, AgentState
+from langchain.agents.middleware import SummarizationMiddleware, before_agent, after_agent
+from langchain.messages import HumanMessage, AIMessage, RemoveMessage, ToolMessage
 from langgraph.checkpoint.memory import InMemorySaver
-from langchain.agents.middleware import SummarizationMiddleware
-from langchain.messages import HumanMessage, AIMessage
-from pprint import pprint
-
-from typing import Any
-from langchain.agents import AgentState
-from langchain.messages import RemoveMessage
 from langgraph.runtime import Runtime
-from langchain.agents.middleware import before_agent, after_agent
-from langchain.messages import ToolMessage
 
 from utils.llm import get_llm
 
@@ -46,20 +33,43 @@ def log_messages(state: AgentState, runtime: Runtime) -> dict[str, Any] | None:
 
 #msg.content = re.sub(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b", "email_REDACTED", msg.content)
 
+# Prefer RE2's linear-time DFA engine (pip install google-re2) when available
+try:
+    import re2 as _regex_engine
+except ImportError:
+    _regex_engine = re
+
+# Compiled once at import instead of on every middleware call
+EMAIL_RE = _regex_engine.compile(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b")
+
+class RedactState(AgentState):
+    # Messages before this index were already scanned (kept per thread in the checkpoint)
+    redacted_upto: NotRequired[int]
+
+
 #@after_agent
-@before_agent
-def redact_email(state: AgentState, runtime: Runtime) -> dict[str, Any] | None:
+@before_agent(state_schema=RedactState)
+def redact_email(state: RedactState, runtime: Runtime) -> dict[str, Any] | None:
     messages = state["messages"]
-    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-    for msg in messages:
-        if isinstance(msg, AIMessage | HumanMessage):            
-            msg.content = re.sub(
-                r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b", 
-                #f"EMAIL_REDACTED@{timestamp}.com", 
-                "myemail@test.com", 
-                msg.content
-            )
-    return {"messages": messages}  
+    start = state.get("redacted_upto", 0)
+    if start > len(messages):
+        # History was shortened (e.g. summarized): scan it all again
+        start = 0
+    changed = []
+    # On long transcripts only messages added since the last run get scanned
+    for msg in messages[start:]:
+        if isinstance(msg, AIMessage | HumanMessage):
+            content = msg.content
+            # Skip non-text content and the common no-email case
+            if isinstance(content, str) and "@" in content:
+                redacted = EMAIL_RE.sub("myemail@test.com", content)
+                if redacted != content:
+                    changed.append(msg.model_copy(update={"content": redacted}))
+    update: dict[str, Any] = {"redacted_upto": len(messages)}
+    # Only the edited messages (add_messages replaces them by id)
+    if changed:
+        update["messages"] = changed
+    return update
 
 
 agent = create_agent(
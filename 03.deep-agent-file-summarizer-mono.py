@@ -12,7 +12,9 @@ Based on LangGraph and LangChain 1.0 architecture.
 """
 
 import pathlib
+import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Annotated, Literal, NotRequired
 
@@ -27,7 +29,6 @@ from typing_extensions import TypedDict
 
 # Rich library for beautiful terminal output
 from rich.console import Console
-from rich.panel import Panel
 from rich.markdown import Markdown
 from rich.theme import Theme
 
@@ -36,6 +37,7 @@ from prompt_toolkit import PromptSession
 from prompt_toolkit.history import FileHistory
 from prompt_toolkit.formatted_text import HTML
 
+from utils.config import llm_config
 from utils.llm import get_llm
 
 from utils.tools.filesystem import (
@@ -74,11 +76,12 @@ class Todo(TypedDict):
 def file_reducer(left, right):
     """Merge two file dictionaries, right side takes precedence."""
     if left is None:
-        return right
+        return right or {}
     elif right is None:
         return left
     else:
-        return {**left, **right}
+        # Single C-level merge; never mutate left, LangGraph may still hold it
+        return left | right
 
 
 class DeepAgentState(AgentState):
@@ -127,6 +130,7 @@ def list_files_in_dir(
         return f"Error: Path is not a directory: {path}"
     
     try:
+        ext_set = frozenset(ext.lower() for ext in extensions) if extensions else None
         items = []
         iterator = path.rglob("*") if recursive else path.iterdir()
         
@@ -140,9 +144,8 @@ def list_files_in_dir(
                 continue
             
             # Filter by extension if specified
-            if extensions:
-                if item.suffix.lower() not in [ext.lower() for ext in extensions]:
-                    continue
+            if ext_set and item.suffix.lower() not in ext_set:
+                continue
             
             items.append(str(item))
         
@@ -430,8 +433,14 @@ class SubAgent(TypedDict):
     tools: NotRequired[list[str]]
 
 
+class SubAgentTask(TypedDict):
+    """One item of a task_batch call."""
+    description: str
+    subagent_type: str
+
+
 def create_task_tool(tools, subagents: list[SubAgent], model, state_schema):
-    """Create a task delegation tool for context isolation through sub-agents."""
+    """Create task delegation tools (single and batched) for context isolation through sub-agents."""
     
     agents = {}
     tools_by_name = {}
@@ -441,21 +450,37 @@ def create_task_tool(tools, subagents: list[SubAgent], model, state_schema):
             tool_ = tool(tool_)
         tools_by_name[tool_.name] = tool_
     
+    # Sub-agents with the same prompt and tool set share one compiled graph
+    compiled = {}
     for _agent in subagents:
         if "tools" in _agent:
-            _tools = [tools_by_name[t] for t in _agent["tools"] if t in tools_by_name]
+            _tools = tuple(tools_by_name[t] for t in _agent["tools"] if t in tools_by_name)
         else:
-            _tools = tools
-        agents[_agent["name"]] = create_agent(
-            model, 
-            system_prompt=_agent["prompt"], 
-            tools=_tools, 
-            state_schema=state_schema
-        )
-    
-    other_agents_string = [f"- {a['name']}: {a['description']}" for a in subagents]
+            _tools = tuple(tools_by_name.values())
+        key = (_agent["prompt"], tuple(t.name for t in _tools))
+        if key not in compiled:
+            compiled[key] = create_agent(
+                model, 
+                system_prompt=_agent["prompt"], 
+                tools=list(_tools), 
+                state_schema=state_schema
+            )
+        agents[_agent["name"]] = compiled[key]
+    
+    # Rendered once and shared by both tool descriptions
+    other_agents_string = "\n".join(f"- {a['name']}: {a['description']}" for a in subagents)
+    
+    def run_subagent(description: str, subagent_type: str, state) -> dict:
+        """Run one sub-agent on an isolated copy of the parent state."""
+        console.print(f"🤖 Delegating to [cyan]{subagent_type}[/cyan]: {description[:50]}...", style="info")
+        
+        # Create isolated context
+        isolated_state = dict(state)
+        isolated_state["messages"] = [{"role": "user", "content": description}]
+        
+        return agents[subagent_type].invoke(isolated_state)
     
-    @tool(description=f"Delegate a task to a specialized sub-agent. Available agents:\n" + "\n".join(other_agents_string))
+    @tool(description=f"Delegate a task to a specialized sub-agent. Available agents:\n" + other_agents_string)
     def task(
         description: str,
         subagent_type: str,
@@ -471,29 +496,78 @@ def create_task_tool(tools, subagents: list[SubAgent], model, state_schema):
         if subagent_type not in agents:
             return f"Error: Unknown agent type '{subagent_type}'. Available: {list(agents.keys())}"
         
-        console.print(f"🤖 Delegating to [cyan]{subagent_type}[/cyan]: {description[:50]}...", style="info")
+        result = run_subagent(description, subagent_type, state)
         
-        sub_agent = agents[subagent_type]
+        return Command(
+            update={
+                "files": result.get("files", {}),
+                "messages": [
+                    ToolMessage(
+                        result["messages"][-1].content, 
+                        tool_call_id=tool_call_id
+                    )
+                ],
+            }
+        )
+    
+    @tool(description=(
+        "Delegate several independent tasks to sub-agents in one call; they run in parallel. "
+        "Each task is a dict with 'description' and 'subagent_type'. Available agents:\n"
+        + other_agents_string
+    ))
+    def task_batch(
+        tasks: list[SubAgentTask],
+        state: Annotated[state_schema, InjectedState],
+        tool_call_id: Annotated[str, InjectedToolCallId],
+    ):
+        """Delegate independent tasks to sub-agents concurrently.
         
-        # Create isolated context
-        isolated_state = dict(state)
-        isolated_state["messages"] = [{"role": "user", "content": description}]
+        Args:
+            tasks: List of {"description": str, "subagent_type": str} items.
+        """
+        if not tasks:
+            return "Error: No tasks provided."
+        # Bad items come back to the model as a tool error instead of failing the run
+        invalid = [
+            i for i, t in enumerate(tasks, 1)
+            if not isinstance(t, dict)
+            or not isinstance(t.get("description"), str)
+            or not isinstance(t.get("subagent_type"), str)
+        ]
+        if invalid:
+            return f"Error: Task(s) {invalid} need a 'description' and a 'subagent_type' string."
+        unknown = [t["subagent_type"] for t in tasks if t["subagent_type"] not in agents]
+        if unknown:
+            return f"Error: Unknown agent type(s) {unknown}. Available: {list(agents.keys())}"
         
-        result = sub_agent.invoke(isolated_state)
+        # Sub-agent calls are network-bound, so threads overlap the LLM round-trips
+        # (at most SUBAGENT_MAX_CONCURRENCY at once; the rest queue)
+        workers = min(len(tasks), max(1, llm_config.subagent_concurrency))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(
+                lambda t: run_subagent(t["description"], t["subagent_type"], state),
+                tasks,
+            ))
+        
+        files = {}
+        sections = []
+        for i, (t, result) in enumerate(zip(tasks, results), 1):
+            files = file_reducer(files, result.get("files", {}))
+            sections.append(f"### Task {i} ({t['subagent_type']})\n{result['messages'][-1].content}")
         
         return Command(
             update={
-                "files": result.get("files", {}),
+                "files": files,
                 "messages": [
                     ToolMessage(
-                        result["messages"][-1].content, 
+                        "\n\n".join(sections),
                         tool_call_id=tool_call_id
                     )
                 ],
             }
         )
     
-    return task
+    return [task, task_batch]
 
 
 # =============================================================================
@@ -548,7 +622,7 @@ Be concise but informative. Focus on what's most important in each file.""",
 file_search_tools = [find_files, list_files_in_dir, think]
 summarization_tools = [read_file_content, think]
 
-task_tool = create_task_tool(
+task_tools = create_task_tool(
     file_search_tools + summarization_tools,
     [FILE_SEARCH_AGENT, SUMMARIZATION_AGENT],
     llm,
@@ -565,11 +639,13 @@ all_tools = [
     write_todos,
     read_todos,
     think,
-    task_tool,
+    *task_tools,
 ]
 
 # Main agent system prompt
-DEEP_AGENT_INSTRUCTIONS = f"""You are a Deep Agent File System Assistant. Today's date is {datetime.now().strftime("%B %d, %Y")}.
+# Keep the static instructions first and the date last, so the prompt prefix
+# (and the provider's prompt cache) stays identical across days
+DEEP_AGENT_INSTRUCTIONS = f"""You are a Deep Agent File System Assistant.
 
 You help users with file system tasks including:
 - Searching and listing files
@@ -592,6 +668,7 @@ For specialized tasks, you can delegate to sub-agents:
 - **summarization-agent**: For reading and summarizing file contents
 
 Delegate when tasks benefit from isolated focus. Each sub-agent has clean context.
+When several delegations are independent (e.g. summarizing many files), use `task_batch` to run them in parallel.
 
 ## File Operations
 
@@ -607,6 +684,8 @@ Delegate when tasks benefit from isolated focus. Each sub-agent has clean contex
 3. Delegate appropriately to sub-agents
 4. Save final results to disk when requested
 5. Be concise but helpful in responses
+
+Today's date is {datetime.now().strftime("%B %d, %Y")}.
 """
 
 # Create the main agent
@@ -623,13 +702,13 @@ agent = create_agent(
 # INTERACTIVE CHAT LOOP
 # =============================================================================
 
-def main():
-    """Run the interactive chat bot."""
-    
-    # Thread ID for conversation persistence
-    thread_id = "deep_agent_session_1"
+# Parsed once instead of on every prompt
+PROMPT_HTML = HTML('\n<ansigreen><b>You:</b></ansigreen> ')
+
+def show_banner():
+    """Print the welcome banner. Panel is only imported when the banner is shown."""
+    from rich.panel import Panel
     
-    # Display header
     console.print()
     console.print(Panel.fit(
         "[bold cyan]🤖 Deep Agent File System Assistant[/bold cyan]\n\n"
@@ -648,18 +727,29 @@ def main():
         padding=(1, 2)
     ))
     console.print()
+
+
+def main():
+    """Run the interactive chat bot."""
+    
+    # Thread ID for conversation persistence
+    thread_id = "deep_agent_session_1"
     
     # Initialize prompt session with history
     history_file = pathlib.Path.home() / ".deep_agent_history"
     session = PromptSession(history=FileHistory(str(history_file)))
     
+    # Skip the banner for scripted use: --no-banner
+    if "--no-banner" not in sys.argv:
+        show_banner()
+    
     # Initial state
     initial_state = {"todos": [], "files": {}}
     
     # Chat loop
     while True:
         try:
-            user_input = session.prompt(HTML('\n<ansigreen><b>You:</b></ansigreen> ')).strip()
+            user_input = session.prompt(PROMPT_HTML).strip()
         except (KeyboardInterrupt, EOFError):
             console.print("\n[yellow]👋 Goodbye![/yellow]")
             break
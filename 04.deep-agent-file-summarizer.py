@@ -11,18 +11,21 @@ Inspired by Claude Code, Deep Research, and Manus patterns.
 Based on LangGraph and LangChain 1.0 architecture.
 """
 
+import asyncio
 import pathlib
+import sys
+import uuid
 from datetime import datetime
 from typing import Annotated
 
 from langchain.agents import create_agent
+from langchain.agents.middleware import SummarizationMiddleware
 from langchain_core.messages import HumanMessage
-from langgraph.checkpoint.memory import InMemorySaver
 from langgraph.prebuilt import InjectedState
 
 # Rich library for beautiful terminal output
+from rich.live import Live
 from rich.panel import Panel
-from rich.markdown import Markdown
 
 # prompt_toolkit for cross-platform history support
 from prompt_toolkit import PromptSession
@@ -30,10 +33,12 @@ from prompt_toolkit.history import FileHistory
 from prompt_toolkit.formatted_text import HTML
 
 # Import shared modules
-from utils.llm import get_llm
+from utils.llm import get_llm, cached_system_prompt, stable_tools, aprewarm, cached_token_counter
+from utils.checkpointer import sqlite_checkpointer
 from utils.state import DeepAgentState
-from utils.subagents import create_task_tool
-from utils.console import console
+from utils.subagents import create_task_tool, create_per_file_tool
+from utils.summary_cache import SummaryCache
+from utils.console import console, content_text, StreamingMarkdown
 from utils.prompts import (
     FILE_SEARCH_AGENT_PROMPT, 
     SUMMARIZATION_AGENT_PROMPT, 
@@ -62,7 +67,8 @@ from utils.tools.filesystem import (
 from utils.tools.planning import (
     write_todos,
     read_todos,
-    think
+    think,
+    get_today
 )
 
 # =============================================================================
@@ -78,6 +84,7 @@ FILE_SEARCH_AGENT = {
     "description": "Searches for files in directories. Use for finding files by pattern or extension.",
     "prompt": FILE_SEARCH_AGENT_PROMPT,
     "tools": ["find_files", "list_files_in_dir", "think"],
+    "files": False,  # Discovers files on disk; never reads the virtual files
 }
 
 SUMMARIZATION_AGENT = {
@@ -85,17 +92,30 @@ SUMMARIZATION_AGENT = {
     "description": "Reads files and creates concise summaries. Use for summarizing file contents.",
     "prompt": SUMMARIZATION_AGENT_PROMPT,
     "tools": ["read_file_content", "think"],
+    "cache": True,  # Summaries of unchanged files are reused across turns and sessions
 }
 
 # Create task delegation tool
 file_search_tools = [find_files, list_files_in_dir, think]
 summarization_tools = [read_file_content, think]
 
+summary_cache = SummaryCache()
+
 task_tool = create_task_tool(
     file_search_tools + summarization_tools,
     [FILE_SEARCH_AGENT, SUMMARIZATION_AGENT],
     llm,
-    DeepAgentState
+    DeepAgentState,
+    cache=summary_cache,
+)
+
+# One summarization run per file, so each prompt holds a single document
+summarize_files = create_per_file_tool(
+    summarization_tools,
+    SUMMARIZATION_AGENT,
+    llm,
+    DeepAgentState,
+    cache=summary_cache,
 )
 
 # All tools available to main agent
@@ -107,30 +127,54 @@ all_tools = [
     create_folder,
     write_todos,
     read_todos,
+    get_today,
     web_hybrid_search,
     think,
     task_tool,
+    summarize_files,
 ]
 
 # Create the main agent
-agent = create_agent(
-    model=llm,
-    tools=all_tools,
-    system_prompt=get_deep_agent_instructions(),
-    state_schema=DeepAgentState,
-    checkpointer=InMemorySaver(),
-)
+main_tools = stable_tools(all_tools)
+system_prompt = cached_system_prompt(get_deep_agent_instructions())
+
+# Checkpoints live on disk, so long sessions don't grow memory and can be resumed
+CHECKPOINT_PATH = str(pathlib.Path.home() / ".deep_agent_checkpoints.sqlite3")
+
+
+def session_thread_id() -> tuple[str, bool]:
+    """(thread_id, resumed): `--thread <id>` continues a saved conversation, otherwise each run starts fresh."""
+    if "--thread" in sys.argv[:-1]:
+        return sys.argv[sys.argv.index("--thread") + 1], True
+    return uuid.uuid4().hex[:8], False
+
+
+def make_agent(checkpointer):
+    return create_agent(
+        model=llm,
+        tools=main_tools,
+        system_prompt=system_prompt,
+        state_schema=DeepAgentState,
+        # Past ~8k tokens, older turns are folded into one summary and the last 20
+        # messages stay verbatim, so per-turn prefill stays bounded
+        middleware=[
+            SummarizationMiddleware(
+                model=llm,
+                trigger=("tokens", 8000),
+                keep=("messages", 20),
+                token_counter=cached_token_counter(),
+            ),
+        ],
+        checkpointer=checkpointer,
+    )
 
 
 # =============================================================================
 # INTERACTIVE CHAT LOOP
 # =============================================================================
 
-def main():
-    """Run the interactive chat bot."""
-    
-    # Thread ID for conversation persistence
-    thread_id = "deep_agent_session_1"
+async def chat(agent, thread_id: str, resumed: bool = False):
+    """Run the interactive chat bot on the conversation `thread_id`."""
     
     # Display header
     console.print()
@@ -142,6 +186,8 @@ def main():
         "  • 📁 File system tools\n"
         "  • 🔀 Sub-agent delegation\n"
         "  • 💾 Persistent memory\n\n"
+        f"[dim]Session[/dim] [green]{thread_id}[/green]"
+        f"{' (resumed)' if resumed else ''}[dim], continue it later with --thread {thread_id}[/dim]\n\n"
         "[dim]Example requests:[/dim]\n"
         '  • "List all .py files in ~/projects"\n'
         '  • "Find and summarize all markdown files in ./docs"\n'
@@ -156,13 +202,14 @@ def main():
     history_file = pathlib.Path.home() / ".deep_agent_history"
     session = PromptSession(history=FileHistory(str(history_file)))
     
-    # Initial state
-    initial_state = {"todos": [], "files": {}}
+    # One state dict reused across turns; only its entries are swapped
+    # (a resumed session keeps the todos and files from its checkpoint)
+    state = {"messages": []} if resumed else {"messages": [], "todos": [], "files": {}}
     
     # Chat loop
     while True:
         try:
-            user_input = session.prompt(HTML('\n<ansigreen><b>You:</b></ansigreen> ')).strip()
+            user_input = (await session.prompt_async(HTML('\n<ansigreen><b>You:</b></ansigreen> '))).strip()
         except (KeyboardInterrupt, EOFError):
             console.print("\n[yellow]👋 Goodbye![/yellow]")
             break
@@ -179,30 +226,62 @@ def main():
         # Create message
         human_msg = HumanMessage(user_input)
         
-        # Process with status indicator
-        with console.status("[bold cyan]🤖 Processing...", spinner="dots"):
-            try:
-                result = agent.invoke(
-                    {"messages": [human_msg], **initial_state},
-                    config={"configurable": {"thread_id": thread_id}}
-                )
-            except Exception as e:
-                console.print(f"\n[bold red]Error:[/bold red] {str(e)}")
-                continue
+        state["messages"] = [human_msg]
         
-        # Display response
-        ai_response = result["messages"][-1].content
-        console.print("\n[bold cyan]🤖 Bot:[/bold cyan]")
-        console.print(Markdown(ai_response))
+        # Stream tokens as they arrive, rendered as Markdown at Live's refresh rate
+        ai_response = StreamingMarkdown()
+        live = None
+        result = {}
+        try:
+            async for event in agent.astream_events(
+                state,
+                config={"configurable": {"thread_id": thread_id}},
+                version="v2"
+            ):
+                kind = event["event"]
+                
+                # Only the main agent's tokens; sub-agents run nested under the task tool
+                if kind == "on_chat_model_stream" and "|" not in event["metadata"].get("langgraph_checkpoint_ns", ""):
+                    # Block lists (e.g. with LLM_CACHE_CONTROL) are flattened to their text
+                    content = content_text(event["data"]["chunk"].content)
+                    if content:
+                        if live is None:
+                            console.print("\n[bold cyan]🤖 Bot:[/bold cyan]")
+                            live = Live(ai_response, console=console, refresh_per_second=10)
+                            live.start()
+                        ai_response.append(content)
+                
+                # The outermost graph finishing carries the final state
+                elif kind == "on_chain_end" and not event["parent_ids"]:
+                    result = event["data"]["output"]
+        except Exception as e:
+            console.print(f"\n[bold red]Error:[/bold red] {str(e)}")
+            continue
+        finally:
+            if live is not None:
+                live.stop()
         
         # Update state for next iteration
-        if "todos" in result:
-            initial_state["todos"] = result["todos"]
-        if "files" in result:
-            initial_state["files"] = result["files"]
+        for key in ("todos", "files"):
+            if key in result:
+                state[key] = result[key]
     
     console.print("\n")
 
 
+async def main():
+    # Async saver: the chat loop drives the agent with astream_events
+    thread_id, resumed = session_thread_id()
+    async with sqlite_checkpointer(CHECKPOINT_PATH) as checkpointer:
+        # Warm the provider's prompt cache while the user types the first message
+        prewarm = asyncio.create_task(aprewarm(llm, system_prompt, main_tools))
+        try:
+            await chat(make_agent(checkpointer), thread_id, resumed)
+        finally:
+            # Not left pending (or still running) when the chat ends
+            prewarm.cancel()
+            await asyncio.gather(prewarm, return_exceptions=True)
+
+
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
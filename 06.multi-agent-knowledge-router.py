@@ -6,25 +6,24 @@ A router classifies queries, routes them to specialized agents in parallel,
 and synthesizes results into a combined response.
 """
 
+import asyncio
 import operator
-from typing import Annotated, Literal, TypedDict
+import re
+from typing import Annotated, Literal, Optional, TypedDict
 
 from langchain.agents import create_agent
 from langchain.chat_models import init_chat_model
 from langchain.tools import tool
+from langgraph.config import get_stream_writer
 from langgraph.graph import StateGraph, START, END
-from langgraph.types import Send
 from pydantic import BaseModel, Field
-from utils.llm import get_llm
+from utils.llm import get_llm, get_embeddings
+from utils.semantic_cache import CachedLLM, cosine_similarity
+from utils.console import StreamingMarkdown
 from pprint import pprint
 
 
 # State definitions
-class AgentInput(TypedDict):
-    """Simple input state for each subagent."""
-    query: str
-
-
 class AgentOutput(TypedDict):
     """Output from each subagent."""
     source: str
@@ -100,9 +99,11 @@ def get_thread(thread_id: str) -> str:
 llm = get_llm()
 
 model = llm
-router_llm = llm
+# Repeated or near-identical prompts are answered from cache (exact match, plus
+# embedding similarity when LLM_EMBEDDING_MODEL is set)
+router_llm = CachedLLM(llm, threshold=0.90)
 
-github_agent = create_agent(
+github_agent = CachedLLM(create_agent(
     model,
     tools=[search_code, search_issues, search_prs],
     system_prompt=(
@@ -110,9 +111,9 @@ github_agent = create_agent(
         "API references, and implementation details by searching "
         "repositories, issues, and pull requests."
     ),
-)
+))
 
-notion_agent = create_agent(
+notion_agent = CachedLLM(create_agent(
     model,
     tools=[search_notion, get_page],
     system_prompt=(
@@ -120,9 +121,9 @@ notion_agent = create_agent(
         "processes, policies, and team documentation by searching "
         "the organization's Notion workspace."
     ),
-)
+))
 
-slack_agent = create_agent(
+slack_agent = CachedLLM(create_agent(
     model,
     tools=[search_slack, get_thread],
     system_prompt=(
@@ -130,18 +131,15 @@ slack_agent = create_agent(
         "relevant threads and discussions where team members have "
         "shared knowledge and solutions."
     ),
-)
+))
 
 
-# Workflow nodes
-def classify_query(state: RouterState) -> dict:
-    """Classify query and determine which agents to invoke."""
-    structured_llm = router_llm.with_structured_output(ClassificationResult)
+# Bound once at import instead of per request
+STRUCTURED_ROUTER = router_llm.with_structured_output(ClassificationResult, threshold=0.95)
 
-    result = structured_llm.invoke([
-        {
-            "role": "system",
-            "content": """Analyze this query and determine which knowledge bases to consult.
+_CLASSIFY_SYSTEM_MSG = {
+    "role": "system",
+    "content": """Analyze this query and determine which knowledge bases to consult.
 For each relevant source, generate a targeted sub-question optimized for that source.
 
 Available sources:
@@ -150,84 +148,138 @@ Available sources:
 - slack: Team discussions, informal knowledge sharing, recent conversations
 
 Return ONLY the sources that are relevant to the query."""
-        },
+}
+
+_SYNTH_SYSTEM_TMPL = """Synthesize these search results to answer the original question: "{query}"
+
+- Combine information from multiple sources without redundancy
+- Highlight the most relevant and actionable information
+- Note any discrepancies between sources
+- Keep the response concise and well-organized"""
+
+
+_TITLE = {"github": "Github", "notion": "Notion", "slack": "Slack"}
+
+
+# Cheap routing before the classifier LLM
+SOURCE_KEYWORDS = {
+    "github": re.compile(r"\b(prs?|pull requests?|commits?|repos?|repository|issues?|code|bugs?|branch)\b", re.I),
+    "notion": re.compile(r"\b(docs?|documentation|wiki|polic(?:y|ies)|process(?:es)?|guides?|handbook)\b", re.I),
+    "slack": re.compile(r"\b(threads?|channels?|slack|discussions?|discussed|conversations?|chat)\b", re.I),
+}
+
+SOURCE_DESCRIPTIONS = {
+    "github": "Code, API references, implementation details, issues, pull requests",
+    "notion": "Internal documentation, processes, policies, team wikis",
+    "slack": "Team discussions, informal knowledge sharing, recent conversations",
+}
+
+embeddings = get_embeddings()
+_source_vectors: dict[str, list[float]] = {}
+
+
+async def fast_classify(query: str) -> Optional[list[Classification]]:
+    """Route without an LLM call when the query clearly targets one source.
+
+    1. Exactly one source's keywords match -> that source.
+    2. Otherwise, if embeddings are configured, sources whose description
+       embedding has cosine > 0.6 with the query.
+    Returns None when neither is confident; the caller then asks the LLM.
+    """
+    matched = [source for source, pattern in SOURCE_KEYWORDS.items() if pattern.search(query)]
+    if len(matched) == 1:
+        return [{"source": matched[0], "query": query}]
+
+    if embeddings is None:
+        return None
+    if not _source_vectors:
+        vectors = await embeddings.aembed_documents(list(SOURCE_DESCRIPTIONS.values()))
+        _source_vectors.update(zip(SOURCE_DESCRIPTIONS, vectors))
+    query_vector = await embeddings.aembed_query(query)
+    close = [s for s, v in _source_vectors.items() if cosine_similarity(query_vector, v) > 0.6]
+    return [{"source": s, "query": query} for s in close] or None
+
+
+# Workflow nodes
+async def classify_query(state: RouterState) -> dict:
+    """Classify query and determine which agents to invoke."""
+    classifications = await fast_classify(state["query"])
+    if classifications is not None:
+        return {"classifications": classifications}
+
+    result = await STRUCTURED_ROUTER.ainvoke([
+        _CLASSIFY_SYSTEM_MSG,
         {"role": "user", "content": state["query"]}
     ])
 
     return {"classifications": result.classifications}
 
 
-def route_to_agents(state: RouterState) -> list[Send]:
-    """Fan out to agents based on classifications."""
-    return [
-        Send(c["source"], {"query": c["query"]})
-        for c in state["classifications"]
-    ]
+AGENTS = {
+    "github": github_agent,
+    "notion": notion_agent,
+    "slack": slack_agent,
+}
 
 
-def query_github(state: AgentInput) -> dict:
-    """Query the GitHub agent."""
-    result = github_agent.invoke({
-        "messages": [{"role": "user", "content": state["query"]}]
-    })
-    return {"results": [{"source": "github", "result": result["messages"][-1].content}]}
+async def query_all(state: RouterState) -> dict:
+    """Query every classified source in one node.
 
+    Sub-questions for the same source go out as a single `abatch` (shared
+    client, bounded concurrency); different sources run concurrently.
+    """
+    # Group agent inputs directly; no intermediate per-source query lists
+    by_source: dict[str, list[dict]] = {}
+    for c in state["classifications"]:
+        by_source.setdefault(c["source"], []).append(
+            {"messages": [{"role": "user", "content": c["query"]}]}
+        )
 
-def query_notion(state: AgentInput) -> dict:
-    """Query the Notion agent."""
-    result = notion_agent.invoke({
-        "messages": [{"role": "user", "content": state["query"]}]
-    })
-    return {"results": [{"source": "notion", "result": result["messages"][-1].content}]}
+    async def run_source(source: str, inputs: list[dict]) -> list[AgentOutput]:
+        responses = await AGENTS[source].abatch(inputs, config={"max_concurrency": 3})
+        return [{"source": source, "result": r["messages"][-1].content} for r in responses]
 
+    grouped = await asyncio.gather(*(run_source(s, qs) for s, qs in by_source.items()))
+    return {"results": [r for results in grouped for r in results]}
 
-def query_slack(state: AgentInput) -> dict:
-    """Query the Slack agent."""
-    result = slack_agent.invoke({
-        "messages": [{"role": "user", "content": state["query"]}]
-    })
-    return {"results": [{"source": "slack", "result": result["messages"][-1].content}]}
 
-
-def synthesize_results(state: RouterState) -> dict:
+async def synthesize_results(state: RouterState) -> dict:
     """Combine results from all agents into a coherent answer."""
     if not state["results"]:
         return {"final_answer": "No results found from any knowledge source."}
 
-    formatted = [
-        f"**From {r['source'].title()}:**\n{r['result']}"
-        for r in state["results"]
-    ]
+    # A single answer has nothing to combine; skip the synthesizer call
+    if len(state["results"]) == 1:
+        return {"final_answer": state["results"][0]["result"]}
 
-    synthesis_response = router_llm.invoke([
-        {
-            "role": "system",
-            "content": f"""Synthesize these search results to answer the original question: "{state['query']}"
+    formatted = "\n\n".join(
+        f"**From {_TITLE[r['source']]}:**\n{r['result']}" for r in state["results"]
+    )
 
-- Combine information from multiple sources without redundancy
-- Highlight the most relevant and actionable information
-- Note any discrepancies between sources
-- Keep the response concise and well-organized"""
-        },
-        {"role": "user", "content": "\n\n".join(formatted)}
-    ])
+    # Tokens go out on the "custom" stream as they arrive; the full answer is
+    # still returned as the node's state update
+    writer = get_stream_writer()
+    answer = ""
+    async for chunk in router_llm.astream([
+        {"role": "system", "content": _SYNTH_SYSTEM_TMPL.format(query=state["query"])},
+        {"role": "user", "content": formatted}
+    ]):
+        if chunk.content:
+            writer({"final_answer_token": chunk.content})
+            answer += chunk.content
 
-    return {"final_answer": synthesis_response.content}
+    return {"final_answer": answer}
 
 
 # Build workflow
 workflow = (
     StateGraph(RouterState)
     .add_node("classify", classify_query)
-    .add_node("github", query_github)
-    .add_node("notion", query_notion)
-    .add_node("slack", query_slack)
+    .add_node("query_all", query_all)
     .add_node("synthesize", synthesize_results)
     .add_edge(START, "classify")
-    .add_conditional_edges("classify", route_to_agents, ["github", "notion", "slack"])
-    .add_edge("github", "synthesize")
-    .add_edge("notion", "synthesize")
-    .add_edge("slack", "synthesize")
+    .add_edge("classify", "query_all")
+    .add_edge("query_all", "synthesize")
     .add_edge("synthesize", END)
     .compile()
 )
@@ -245,11 +297,12 @@ workflow = (
 #     print("Final Answer:")
 #     print(result["final_answer"])
 
-if __name__ == "__main__":
+async def main():
     from rich.console import Console
     from rich.panel import Panel
     from rich.syntax import Syntax
     from rich.markdown import Markdown
+    from rich.live import Live
     from rich import print as rprint
     
     console = Console()
@@ -257,9 +310,30 @@ if __name__ == "__main__":
     
     console.print(f"\n[bold cyan]🔍 Query:[/bold cyan] [italic]{query}[/italic]\n")
     
-    # Stream the execution
+    # Stream the execution: node updates, plus synthesizer tokens on "custom"
     step_count = 0
-    for step in workflow.stream({"query": query}):
+    live = None
+    streamed_answer = StreamingMarkdown()
+    async for mode, step in workflow.astream({"query": query}, stream_mode=["updates", "custom"]):
+        if mode == "custom":
+            if live is None:
+                console.print("\n[bold green]🎯 Final Answer:[/bold green]")
+                live = Live(
+                    Panel(
+                        streamed_answer,
+                        title="[bold green]Synthesized Response[/bold green]",
+                        border_style="green",
+                        padding=(1, 2)
+                    ),
+                    console=console,
+                    refresh_per_second=10,
+                )
+                live.start()
+            streamed_answer.append(step["final_answer_token"])
+            continue
+
+        if live is not None:
+            live.stop()
         step_count += 1
         
         # Each step is a dict where keys are node names
@@ -267,6 +341,7 @@ if __name__ == "__main__":
             # Node header with emoji based on node type
             node_emoji = {
                 "classify": "🎯",
+                "query_all": "🔀",
                 "github": "💻",
                 "notion": "📝",
                 "slack": "💬",
@@ -294,7 +369,8 @@ if __name__ == "__main__":
                         padding=(0, 1)
                     ))
             
-            if "final_answer" in node_output:
+            # A streamed answer was already shown token by token
+            if "final_answer" in node_output and live is None:
                 console.print("\n[bold green]🎯 Final Answer:[/bold green]")
                 console.print(Panel(
                     Markdown(node_output['final_answer']),
@@ -305,4 +381,8 @@ if __name__ == "__main__":
     
     console.print(f"\n[bold cyan]{'─' * 60}[/bold cyan]")
     console.print(f"[bold green]✨ Workflow completed in {step_count} steps[/bold green]")
-    console.print(f"[bold cyan]{'─' * 60}[/bold cyan]\n")
\ No newline at end of file
+    console.print(f"[bold cyan]{'─' * 60}[/bold cyan]\n")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
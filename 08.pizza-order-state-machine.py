@@ -14,8 +14,14 @@ Flow:
 6. Payment - Collect payment information
 """
 
+import asyncio
+import json
+import operator
+import sys
 import uuid
-from typing import Callable, Literal
+from collections import ChainMap
+from functools import lru_cache
+from typing import Awaitable, Callable, Literal
 from typing_extensions import NotRequired
 
 from langgraph.checkpoint.memory import InMemorySaver
@@ -23,10 +29,12 @@ from langgraph.types import Command
 
 from langchain.agents import AgentState, create_agent
 from langchain.agents.middleware import wrap_model_call, ModelRequest, ModelResponse, SummarizationMiddleware
-from langchain.messages import HumanMessage, ToolMessage
+from langchain.messages import HumanMessage, SystemMessage, ToolMessage
 from langchain.tools import tool, ToolRuntime
+from langchain_core.utils.function_calling import convert_to_openai_tool
 from typing import Annotated
-from utils.llm import get_llm
+from utils.llm import get_llm, cached_system_prompt, cached_token_counter
+from utils.semantic_cache import TurnCache
 
 from typing import Callable, Literal
 from typing_extensions import NotRequired, Annotated
@@ -34,8 +42,29 @@ from typing_extensions import NotRequired, Annotated
 model = get_llm()
 
 def merge_order_items(left: list[dict] | None, right: list[dict] | None) -> list[dict]:
-    """How to merge multiple updates to order_items in a single step."""
-    return (left or []) + (right or [])
+    """How to merge multiple updates to order_items in a single step.
+
+    Tools return only the change: new items are appended, a `{"_remove_id": id}`
+    entry removes the item with that id (so concurrent removals in one step
+    can't shift each other's positions), and `{"_clear": True}` empties the order.
+    Always returns a new list; `left` may still be held by earlier state values.
+    """
+    items = list(left or [])
+    for entry in right or []:
+        if entry.get("_clear"):
+            items = []
+        elif "_remove_id" in entry:
+            items = [item for item in items if item.get("id") != entry["_remove_id"]]
+        else:
+            items.append(entry)
+    return items
+
+
+def merge_order_total(left: float | None, right: float | dict | None) -> float:
+    """Sum order_total deltas; a `{"_reset": True}` update sets the total back to 0."""
+    if isinstance(right, dict):
+        return 0.0 if right.get("_reset") else (left or 0.0)
+    return (left or 0.0) + (right or 0.0)
 
 
 # Define the possible workflow steps
@@ -52,11 +81,10 @@ OrderStep = Literal[
 class OrderState(AgentState):
     """State for pizza ordering workflow."""    
     current_step: NotRequired[OrderStep]
-    order_items: NotRequired[list[dict]]  # List of items with name, size, extras, price
-    #order_items: Annotated[NotRequired[list[dict]], merge_order_items]
+    order_items: NotRequired[Annotated[list[dict], merge_order_items]]  # List of items with name, size, extras, price
     order_type: NotRequired[Literal["pickup", "delivery"]]
     delivery_address: NotRequired[str]
-    order_total: NotRequired[float]
+    order_total: NotRequired[Annotated[float, merge_order_total]]  # Tools return the change, not the new total
     payment_confirmed: NotRequired[bool]
 
 
@@ -123,28 +151,35 @@ DRINK_PRICES = {
 # Tools
 # =============================================================================
 
+def _cmd(runtime: ToolRuntime, message: str, **updates) -> Command:
+    """Command that answers the tool call with `message` and applies `updates` to state."""
+    return Command(update={
+        "messages": [ToolMessage(content=message, tool_call_id=runtime.tool_call_id)],
+        **updates,
+    })
+
+
+# Tools are async: when the model emits several calls in one turn (e.g. two
+# add_item calls), the agent runs them concurrently on the event loop. Their
+# order_items/order_total updates are deltas merged by the state reducers.
+
 @tool
-def start_order(
+async def start_order(
     runtime: ToolRuntime[None, OrderState],
 ) -> Command:
     """Start taking the customer's order after greeting. Call this after greeting the customer."""
-    return Command(
-        update={
-            "messages": [
-                ToolMessage(
-                    content="Ready to take order. Order collection started.",
-                    tool_call_id=runtime.tool_call_id,
-                )
-            ],
-            "current_step": "order_collection",
-            "order_items": [],
-            "order_total": 0.0,
-        }
+    return _cmd(
+        runtime,
+        "Ready to take order. Order collection started.",
+        current_step="order_collection",
+        # Starting over on a thread that already has an order clears it
+        order_items=[{"_clear": True}],
+        order_total={"_reset": True},
     )
 
 
 @tool
-def add_item(
+async def add_item(
     item_name: str,
     size: str,
     quantity: int,
@@ -162,10 +197,9 @@ def add_item(
         extras: List of extra toppings (for pizzas)
         price: Total price for this item including extras
     """
-    current_items = runtime.state.get("order_items", [])
-    current_total = runtime.state.get("order_total", 0.0)
-    
     new_item = {
+        # Stable id, so removals don't depend on list positions
+        "id": uuid.uuid4().hex[:8],
         "name": item_name,
         "size": size,
         "quantity": quantity,
@@ -173,27 +207,20 @@ def add_item(
         "price": price,
     }
     
-    updated_items = current_items + [new_item]
-    updated_total = current_total + (price * quantity)
-    
     extras_str = f" with {', '.join(extras)}" if extras else ""
     
-    return Command(
-        update={
-            "messages": [
-                ToolMessage(
-                    content=f"Added: {quantity}x {size} {item_name}{extras_str} (${price:.2f} each). Running total: ${updated_total:.2f}",
-                    tool_call_id=runtime.tool_call_id,
-                )
-            ],
-            "order_items": updated_items,
-            "order_total": updated_total,
-        }
+    return _cmd(
+        runtime,
+        # No running total here: concurrent calls only see the pre-step state;
+        # the reduced total reaches the model through the step prompt
+        f"Added: {quantity}x {size} {item_name}{extras_str} (${price:.2f} each).",
+        order_items=[new_item],
+        order_total=price * quantity,
     )
 
 
 @tool
-def remove_item(
+async def remove_item(
     item_index: int,
     runtime: ToolRuntime[None, OrderState],
 ) -> Command:
@@ -206,57 +233,33 @@ def remove_item(
     current_items = runtime.state.get("order_items", [])
     
     if item_index < 1 or item_index > len(current_items):
-        return Command(
-            update={
-                "messages": [
-                    ToolMessage(
-                        content=f"Invalid item number. Order has {len(current_items)} items.",
-                        tool_call_id=runtime.tool_call_id,
-                    )
-                ],
-            }
-        )
+        return _cmd(runtime, f"Invalid item number. Order has {len(current_items)} items.")
     
     removed_item = current_items[item_index - 1]
-    updated_items = current_items[:item_index - 1] + current_items[item_index:]
-    
-    # Recalculate total
-    updated_total = sum(item["price"] * item["quantity"] for item in updated_items)
+    removed_price = removed_item["price"] * removed_item["quantity"]
     
-    return Command(
-        update={
-            "messages": [
-                ToolMessage(
-                    content=f"Removed: {removed_item['name']}. New total: ${updated_total:.2f}",
-                    tool_call_id=runtime.tool_call_id,
-                )
-            ],
-            "order_items": updated_items,
-            "order_total": updated_total,
-        }
+    return _cmd(
+        runtime,
+        f"Removed: {removed_item['name']}.",
+        order_items=[{"_remove_id": removed_item["id"]}],
+        order_total=-removed_price,
     )
 
 
 @tool
-def finish_order_collection(
+async def finish_order_collection(
     runtime: ToolRuntime[None, OrderState],
 ) -> Command:
     """Move to ask about pickup or delivery after customer is done ordering items."""
-    return Command(
-        update={
-            "messages": [
-                ToolMessage(
-                    content="Order collection complete. Now asking about pickup or delivery.",
-                    tool_call_id=runtime.tool_call_id,
-                )
-            ],
-            "current_step": "order_type",
-        }
+    return _cmd(
+        runtime,
+        "Order collection complete. Now asking about pickup or delivery.",
+        current_step="order_type",
     )
 
 
 @tool
-def set_order_type(
+async def set_order_type(
     order_type: Literal["pickup", "delivery"],
     runtime: ToolRuntime[None, OrderState],
 ) -> Command:
@@ -268,22 +271,16 @@ def set_order_type(
     """
     next_step = "delivery_address" if order_type == "delivery" else "order_summary"
     
-    return Command(
-        update={
-            "messages": [
-                ToolMessage(
-                    content=f"Order type set to: {order_type}",
-                    tool_call_id=runtime.tool_call_id,
-                )
-            ],
-            "order_type": order_type,
-            "current_step": next_step,
-        }
+    return _cmd(
+        runtime,
+        f"Order type set to: {order_type}",
+        order_type=order_type,
+        current_step=next_step,
     )
 
 
 @tool
-def set_delivery_address(
+async def set_delivery_address(
     address: str,
     runtime: ToolRuntime[None, OrderState],
 ) -> Command:
@@ -293,58 +290,32 @@ def set_delivery_address(
     Args:
         address: Full delivery address
     """
-    return Command(
-        update={
-            "messages": [
-                ToolMessage(
-                    content=f"Delivery address recorded: {address}",
-                    tool_call_id=runtime.tool_call_id,
-                )
-            ],
-            "delivery_address": address,
-            "current_step": "order_summary",
-        }
+    return _cmd(
+        runtime,
+        f"Delivery address recorded: {address}",
+        delivery_address=address,
+        current_step="order_summary",
     )
 
 
 @tool
-def confirm_order(
+async def confirm_order(
     runtime: ToolRuntime[None, OrderState],
 ) -> Command:
     """Customer confirms the order is complete and ready to pay."""
-    return Command(
-        update={
-            "messages": [
-                ToolMessage(
-                    content="Order confirmed! Moving to payment.",
-                    tool_call_id=runtime.tool_call_id,
-                )
-            ],
-            "current_step": "payment",
-        }
-    )
+    return _cmd(runtime, "Order confirmed! Moving to payment.", current_step="payment")
 
 
 @tool
-def add_more_items(
+async def add_more_items(
     runtime: ToolRuntime[None, OrderState],
 ) -> Command:
     """Customer wants to add more items to their order."""
-    return Command(
-        update={
-            "messages": [
-                ToolMessage(
-                    content="Going back to add more items.",
-                    tool_call_id=runtime.tool_call_id,
-                )
-            ],
-            "current_step": "order_collection",
-        }
-    )
+    return _cmd(runtime, "Going back to add more items.", current_step="order_collection")
 
 
 @tool
-def process_payment(
+async def process_payment(
     payment_method: str,
     runtime: ToolRuntime[None, OrderState],
 ) -> Command:
@@ -361,35 +332,19 @@ def process_payment(
     tax = order_total * 0.085
     final_total = order_total + tax
     
-    return Command(
-        update={
-            "messages": [
-                ToolMessage(
-                    content=f"Payment processed via {payment_method}. Subtotal: ${order_total:.2f}, Tax: ${tax:.2f}, Total: ${final_total:.2f}. Order placed successfully!",
-                    tool_call_id=runtime.tool_call_id,
-                )
-            ],
-            "payment_confirmed": True,
-        }
+    return _cmd(
+        runtime,
+        f"Payment processed via {payment_method}. Subtotal: ${order_total:.2f}, Tax: ${tax:.2f}, Total: ${final_total:.2f}. Order placed successfully!",
+        payment_confirmed=True,
     )
 
 
 @tool
-def go_back_to_order(
+async def go_back_to_order(
     runtime: ToolRuntime[None, OrderState],
 ) -> Command:
     """Go back to modify the order."""
-    return Command(
-        update={
-            "messages": [
-                ToolMessage(
-                    content="Going back to order collection.",
-                    tool_call_id=runtime.tool_call_id,
-                )
-            ],
-            "current_step": "order_collection",
-        }
-    )
+    return _cmd(runtime, "Going back to order collection.", current_step="order_collection")
 
 
 # =============================================================================
@@ -413,11 +368,11 @@ Here's the menu to share:
 
 After greeting and showing the menu, wait for the customer to indicate they want to order, then use start_order."""
 
-ORDER_COLLECTION_PROMPT = f"""You are OrderBot 🍕, a friendly pizza ordering assistant.
+# Static text (MENU baked in) and a small state template; only the template is
+# formatted at runtime and appended to the prefix
+ORDER_COLLECTION_PREFIX = f"""You are OrderBot 🍕, a friendly pizza ordering assistant.
 
 CURRENT STEP: Order Collection
-CURRENT ORDER: {{order_items}}
-CURRENT TOTAL: ${{order_total:.2f}}
 
 At this step, you need to:
 1. Help the customer choose items from the menu
@@ -437,11 +392,11 @@ IMPORTANT:
 - Confirm each item as you add it
 - If customer says they're done ordering or that's all, use finish_order_collection"""
 
-ORDER_TYPE_PROMPT = """You are OrderBot 🍕, a friendly pizza ordering assistant.
+ORDER_COLLECTION_STATE_TMPL = "CURRENT ORDER: {order_items}\nCURRENT TOTAL: ${order_total:.2f}\n"
+
+ORDER_TYPE_PREFIX = """You are OrderBot 🍕, a friendly pizza ordering assistant.
 
 CURRENT STEP: Pickup or Delivery
-CURRENT ORDER: {order_items}
-ORDER TOTAL: ${order_total:.2f}
 
 At this step, you need to:
 1. Ask if this is for pickup or delivery
@@ -449,6 +404,8 @@ At this step, you need to:
 
 Keep it brief and friendly!"""
 
+ORDER_STATE_TMPL = "CURRENT ORDER: {order_items}\nORDER TOTAL: ${order_total:.2f}\n"
+
 DELIVERY_ADDRESS_PROMPT = """You are OrderBot 🍕, a friendly pizza ordering assistant.
 
 CURRENT STEP: Delivery Address
@@ -461,13 +418,9 @@ At this step, you need to:
 
 Make sure to get a complete, deliverable address!"""
 
-ORDER_SUMMARY_PROMPT = """You are OrderBot 🍕, a friendly pizza ordering assistant.
+ORDER_SUMMARY_PREFIX = """You are OrderBot 🍕, a friendly pizza ordering assistant.
 
 CURRENT STEP: Order Summary & Final Check
-CURRENT ORDER: {order_items}
-ORDER TOTAL: ${order_total:.2f}
-ORDER TYPE: {order_type}
-DELIVERY ADDRESS: {delivery_address}
 
 At this step, you need to:
 1. Summarize the complete order with all items and prices
@@ -479,13 +432,11 @@ At this step, you need to:
 
 Format the order summary nicely and make it easy to read!"""
 
-PAYMENT_PROMPT = """You are OrderBot 🍕, a friendly pizza ordering assistant.
+FULL_ORDER_STATE_TMPL = ORDER_STATE_TMPL + "ORDER TYPE: {order_type}\nDELIVERY ADDRESS: {delivery_address}\n"
+
+PAYMENT_PREFIX = """You are OrderBot 🍕, a friendly pizza ordering assistant.
 
 CURRENT STEP: Payment 💳
-CURRENT ORDER: {order_items}
-ORDER TOTAL: ${order_total:.2f}
-ORDER TYPE: {order_type}
-DELIVERY ADDRESS: {delivery_address}
 
 At this step, you need to:
 1. Show the final total with tax (8.5%)
@@ -505,46 +456,73 @@ After payment, thank them and:
 
 STEP_CONFIG = {
     "greeting": {
-        "prompt": GREETING_PROMPT,
+        "prefix": GREETING_PROMPT,
         "tools": [start_order],
         "requires": [],
     },
     "order_collection": {
-        "prompt": ORDER_COLLECTION_PROMPT,
+        "prefix": ORDER_COLLECTION_PREFIX,
+        "state_tmpl": ORDER_COLLECTION_STATE_TMPL,
         "tools": [add_item, remove_item, finish_order_collection],
         "requires": [],
     },
     "order_type": {
-        "prompt": ORDER_TYPE_PROMPT,
+        "prefix": ORDER_TYPE_PREFIX,
+        "state_tmpl": ORDER_STATE_TMPL,
         "tools": [set_order_type, go_back_to_order],
         "requires": ["order_items"],
     },
     "delivery_address": {
-        "prompt": DELIVERY_ADDRESS_PROMPT,
+        "prefix": DELIVERY_ADDRESS_PROMPT,
         "tools": [set_delivery_address, go_back_to_order],
         "requires": ["order_type"],
     },
     "order_summary": {
-        "prompt": ORDER_SUMMARY_PROMPT,
+        "prefix": ORDER_SUMMARY_PREFIX,
+        "state_tmpl": FULL_ORDER_STATE_TMPL,
         "tools": [confirm_order, add_more_items],
         "requires": ["order_items", "order_type"],
     },
     "payment": {
-        "prompt": PAYMENT_PROMPT,
+        "prefix": PAYMENT_PREFIX,
+        "state_tmpl": FULL_ORDER_STATE_TMPL,
         "tools": [process_payment, go_back_to_order],
         "requires": ["order_items", "order_type"],
     },
 }
 
 
+# Serialize each step's tool schemas once; the middleware passes these dicts to
+# the model as-is instead of re-converting the tools on every call. Execution
+# still goes through the tools registered with create_agent, matched by name.
+for _step_config in STEP_CONFIG.values():
+    _step_config["tools_json"] = [convert_to_openai_tool(t) for t in _step_config["tools"]]
+
+
+@lru_cache(maxsize=64)
+def format_step_prompt(step: str, format_key: tuple) -> SystemMessage:
+    """Static prefix plus the formatted state template; repeated turns with unchanged state hit the cache.
+
+    The prefix and the state go in separate blocks, so with LLM_CACHE_CONTROL
+    only the prefix (instructions + MENU) is marked cacheable.
+    """
+    step_config = STEP_CONFIG[step]
+    if "state_tmpl" not in step_config:
+        prompt = cached_system_prompt(step_config["prefix"])
+    else:
+        state = step_config["state_tmpl"].format(**dict(format_key))
+        prompt = cached_system_prompt(step_config["prefix"], "\n\n" + state)
+    return prompt if isinstance(prompt, SystemMessage) else SystemMessage(prompt)
+
+
 # =============================================================================
 # Middleware
 # =============================================================================
 
 @wrap_model_call
-def apply_step_config(
+async def apply_step_config(
     request: ModelRequest,
-    handler: Callable[[ModelRequest], ModelResponse],
+    handler: Callable[[ModelRequest], Awaitable[ModelResponse]],
 ) -> ModelResponse:
     """Configure agent behavior based on the current step."""
     # Get current step (defaults to greeting for first interaction)
@@ -553,24 +531,25 @@ def apply_step_config(
     # Look up step configuration
     step_config = STEP_CONFIG[current_step]
     
-    # Prepare format values with defaults
-    format_values = {
-        "order_items": request.state.get("order_items", []),
-        "order_total": request.state.get("order_total", 0.0),
-        "order_type": request.state.get("order_type", "not set"),
-        "delivery_address": request.state.get("delivery_address", "N/A"),
-    }
-    
-    # Format prompt with state values
-    system_prompt = step_config["prompt"].format(**format_values)
+    # Steps without a state template use their prefix as-is
+    if "state_tmpl" not in step_config:
+        format_key = ()
+    else:
+        # Hashable format values with defaults (order_items as sorted JSON)
+        format_key = (
+            ("order_items", json.dumps(request.state.get("order_items", []), sort_keys=True)),
+            ("order_total", request.state.get("order_total", 0.0)),
+            ("order_type", request.state.get("order_type", "not set")),
+            ("delivery_address", request.state.get("delivery_address", "N/A")),
+        )
     
     # Inject system prompt and step-specific tools
     request = request.override(
-        system_prompt=system_prompt,
-        tools=step_config["tools"],
+        system_message=format_step_prompt(current_step, format_key),
+        tools=step_config["tools_json"],
     )
     
-    return handler(request)
+    return await handler(request)
 
 
 # =============================================================================
@@ -601,7 +580,8 @@ agent = create_agent(
         SummarizationMiddleware(
             model=model,
             trigger=("tokens", 4000),
-            keep=("messages", 10)
+            keep=("messages", 10),
+            token_counter=cached_token_counter(),
         )
     ],
     checkpointer=InMemorySaver(),
@@ -612,7 +592,59 @@ agent = create_agent(
 # Interactive Chat Loop
 # =============================================================================
 
-if __name__ == "__main__":
+async def stream_turn(input, config, prefix: str = "") -> dict:
+    """Run one agent turn, printing the reply token by token; returns the final state."""
+    result = None
+    started = False
+    async for event in agent.astream_events(input, config, version="v2"):
+        kind = event["event"]
+        # Only the agent's own model node (not the summarization call) speaks to the user
+        if kind == "on_chat_model_stream" and event["metadata"].get("langgraph_node") == "model":
+            content = event["data"]["chunk"].content
+            if content:
+                if not started:
+                    print(f"{prefix}🤖 OrderBot: ", end="", flush=True)
+                    started = True
+                sys.stdout.write(content)
+                sys.stdout.flush()
+        # The graph's own end event (no parents) carries the final state
+        elif kind == "on_chain_end" and not event["parent_ids"]:
+            result = event["data"]["output"]
+    if started:
+        print("\n")
+    return result
+
+
+# Paraphrased repeats of a question ("what sizes are there?") answered without
+# the agent. Every pizza tool changes the order, so only tool-free turns are stored.
+turn_cache = TurnCache(threshold=0.92)
+
+# `state` command: one line per key, with the default shown before the step sets it
+_STATE_DEFAULTS = {
+    "current_step": "greeting",
+    "order_type": "not set",
+    "delivery_address": "N/A",
+    "order_items": [],
+    "order_total": 0.0,
+    "payment_confirmed": False,
+}
+_STATE_KEYS = tuple(_STATE_DEFAULTS)
+_STATE_LINES = (
+    "📊 Current Step: {}",
+    "Order Type: {}",
+    "Delivery Address: {}",
+    "Order Items: {}",
+    "Order Total: ${:.2f}",
+    "Payment Confirmed: {}",
+)
+_get_state_values = operator.itemgetter(*_STATE_KEYS)
+
+
+def format_order_state(values: dict) -> str:
+    fields = _get_state_values(ChainMap(values, _STATE_DEFAULTS))
+    return "\n" + "\n   ".join(line.format(v) for line, v in zip(_STATE_LINES, fields)) + "\n"
+
+async def main():
     thread_id = str(uuid.uuid4())
     config = {"configurable": {"thread_id": thread_id}}
 
@@ -626,21 +658,16 @@ if __name__ == "__main__":
     print("=" * 60)
     print()
 
-    # Start the conversation with a greeting
-    result = agent.invoke(
+    # Start the conversation with a greeting (streamed as it is generated)
+    result = await stream_turn(
         {"messages": [HumanMessage("Hi, I'd like to order some pizza")]},
         config
     )
-    
-    # Print the greeting
-    for msg in reversed(result["messages"]):
-        if hasattr(msg, "content") and msg.type == "ai" and msg.content:
-            print(f"🤖 OrderBot: {msg.content}\n")
-            break
+    last_reply = str(result["messages"][-1].content)
 
     while True:
         try:
-            user_input = input("You: ").strip()
+            user_input = (await asyncio.to_thread(input, "You: ")).strip()
         except (EOFError, KeyboardInterrupt):
             print("\n\nThank you for ordering! Goodbye! 👋🍕")
             break
@@ -657,22 +684,37 @@ if __name__ == "__main__":
             continue
 
         if user_input.lower() == "state":
-            snapshot = agent.get_state(config)
-            print(f"\n📊 Current Step: {snapshot.values.get('current_step', 'greeting')}")
-            print(f"   Order Type: {snapshot.values.get('order_type', 'not set')}")
-            print(f"   Delivery Address: {snapshot.values.get('delivery_address', 'N/A')}")
-            print(f"   Order Items: {snapshot.values.get('order_items', [])}")
-            print(f"   Order Total: ${snapshot.values.get('order_total', 0.0):.2f}")
-            print(f"   Payment Confirmed: {snapshot.values.get('payment_confirmed', False)}\n")
+            snapshot = await agent.aget_state(config)
+            print(format_order_state(snapshot.values))
             continue
 
-        result = agent.invoke(
+        # Answers depend on where the order is and on what the bot just said
+        # ("what about that?"), so scope entries by step, order and last reply
+        scope = (
+            thread_id,
+            result.get("current_step", "greeting"),
+            len(result.get("order_items", [])),
+            result.get("order_total", 0.0),
+            last_reply,
+        )
+        hit, cached, vector = await turn_cache.alookup(scope, user_input)
+        if hit:
+            # Record the exchange so the thread history stays complete
+            await agent.aupdate_state(config, {
+                "messages": [HumanMessage(user_input), cached.model_copy(update={"id": None})]
+            })
+            print(f"\n🤖 OrderBot: {cached.content}\n")
+            last_reply = str(cached.content)
+            continue
+
+        result = await stream_turn(
             {"messages": [HumanMessage(user_input)]},
-            config
+            config,
+            prefix="\n",
         )
+        turn_cache.store(scope, user_input, result, vector)
+        last_reply = str(result["messages"][-1].content)
 
-        # Print the last AI response
-        for msg in reversed(result["messages"]):
-            if hasattr(msg, "content") and msg.type == "ai" and msg.content:
-                print(f"\n🤖 OrderBot: {msg.content}\n")
-                break
+
+if __name__ == "__main__":
+    asyncio.run(main())
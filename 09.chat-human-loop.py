@@ -14,7 +14,6 @@ from langchain.agents import create_agent
 from langchain.agents.middleware import PIIMiddleware, SummarizationMiddleware
 
 from langchain_openai import ChatOpenAI
-from langgraph.checkpoint.memory import MemorySaver, InMemorySaver
 from typing import Literal
 from langchain.tools import tool
 
@@ -48,6 +47,7 @@ from prompt_toolkit.history import FileHistory
 from prompt_toolkit.formatted_text import HTML
 
 from utils.llm import get_llm
+from utils.checkpointer import get_checkpointer
 from utils.tools.filesystem import (
     list_files,
     read_file,    
@@ -108,105 +108,102 @@ def send_email(body: str) -> str:
     return f"Email sent"
 
 from langchain.agents import create_agent, AgentState
-from langgraph.checkpoint.memory import InMemorySaver
 from langchain.agents.middleware import HumanInTheLoopMiddleware
 
 class EmailState(AgentState):
     email: str
 
-agent = create_agent(
-    model=llm,
-    tools=[read_email, send_email],
-    state_schema=EmailState,
-    checkpointer=InMemorySaver(),
-    middleware=[
-        HumanInTheLoopMiddleware(
-            interrupt_on={
-                "read_email": False,
-                "send_email": True,
-            },
-            description_prefix="Tool execution requires approval",
-        ),
-    ],
-)
+def make_agent(checkpointer):
+    return create_agent(
+        model=llm,
+        tools=[read_email, send_email],
+        state_schema=EmailState,
+        checkpointer=checkpointer,
+        middleware=[
+            HumanInTheLoopMiddleware(
+                interrupt_on={
+                    "read_email": False,
+                    "send_email": True,
+                },
+                description_prefix="Tool execution requires approval",
+            ),
+        ],
+    )
 
 from langchain.messages import HumanMessage
-
-config = {"configurable": {"thread_id": "1"}}
-
-response = agent.invoke(
-    {
-        "messages": [HumanMessage(content="Please read my email and send a response.")],
-        "email": "Hi Seán, I'm going to be late for our meeting tomorrow. Can we reschedule? Best, John."
-    },
-    config=config
-)
-
-from pprint import pprint
-
-pprint(response)
-
-print(response['__interrupt__'])
-
-# Access just the 'body' argument from the tool call
-print(response['__interrupt__'][0].value['action_requests'][0]['args']['body'])
-
-#Approve
-
 from langgraph.types import Command
-
-response = agent.invoke(
-    Command( 
-        resume={"decisions": [{"type": "approve"}]}
-    ), 
-    config=config # Same thread ID to resume the paused conversation
-)
-
-pprint(response)
-
-#Reject
-response = agent.invoke(
-    Command(        
-        resume={
-            "decisions": [
-                {
-                    "type": "reject",
-                    # An explanation of why the request was rejected
-                    "message": "No please sign off - Your merciful leader, Seán."
-                }
-            ]
-        }
-    ), 
-    config=config # Same thread ID to resume the paused conversation
-    )   
-
-pprint(response)
-
-print(response['__interrupt__'][0].value['action_requests'][0]['args']['body'])
-
-#Edit
-response = agent.invoke(
-    Command(        
-        resume={
-            "decisions": [
-                {
-                    "type": "edit",
-                    # Edited action with tool name and args
-                    "edited_action": {
-                        # Tool name to call.
-                        # Will usually be the same as the original action.
-                        "name": "send_email",
-                        # Arguments to pass to the tool.
-                        "args": {"body": "This is the last straw, you're fired!"},
-                    }
-                }
-            ]
+from pprint import pprint
+import asyncio
+
+# DEBUG=1 dumps full agent responses (the whole message history) after each step
+DEBUG = bool(int(os.getenv("DEBUG", "0")))
+
+EMAIL_REQUEST = {
+    "messages": [HumanMessage(content="Please read my email and send a response.")],
+    "email": "Hi Seán, I'm going to be late for our meeting tomorrow. Can we reschedule? Best, John."
+}
+
+# One demo thread per decision type, so the three cases are independent
+DECISIONS = {
+    #Approve
+    "approve": {"type": "approve"},
+    #Reject
+    "reject": {
+        "type": "reject",
+        # An explanation of why the request was rejected
+        "message": "No please sign off - Your merciful leader, Seán."
+    },
+    #Edit
+    "edit": {
+        "type": "edit",
+        # Edited action with tool name and args
+        "edited_action": {
+            # Tool name to call.
+            # Will usually be the same as the original action.
+            "name": "send_email",
+            # Arguments to pass to the tool.
+            "args": {"body": "This is the last straw, you're fired!"},
         }
-    ), 
-    config=config # Same thread ID to resume the paused conversation
-    )   
-
-pprint(response)
+    },
+}
+
+
+async def demo(agent):
+    configs = {name: {"configurable": {"thread_id": f"email-{name}"}} for name in DECISIONS}
+
+    # Start all threads at once; each pauses on the send_email approval
+    responses = await asyncio.gather(*(
+        agent.ainvoke(EMAIL_REQUEST, config=config) for config in configs.values()
+    ))
+    for name, response in zip(configs, responses):
+        print(f"\n=== {name}: interrupted ===")
+        print(response['__interrupt__'])
+        # Access just the 'body' argument from the tool call
+        print(response['__interrupt__'][0].value['action_requests'][0]['args']['body'])
+
+    # Resume every thread with its decision, concurrently
+    responses = await asyncio.gather(*(
+        agent.ainvoke(
+            Command(resume={"decisions": [DECISIONS[name]]}),
+            config=config # Same thread ID to resume the paused conversation
+        )
+        for name, config in configs.items()
+    ))
+    for name, response in zip(configs, responses):
+        print(f"\n=== {name}: resumed ===")
+        if DEBUG:
+            pprint(response)
+        if "__interrupt__" in response:
+            print(response['__interrupt__'][0].value['action_requests'][0]['args']['body'])
+
+
+async def main():
+    # CHECKPOINT_BACKEND picks memory, sqlite or postgres
+    async with get_checkpointer() as checkpointer:
+        await demo(make_agent(checkpointer))
+
+
+asyncio.run(main())
 
 
 
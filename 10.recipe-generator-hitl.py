@@ -1,7 +1,9 @@
 from langgraph.graph import StateGraph, END
 from langgraph.checkpoint.memory import InMemorySaver
-from typing import TypedDict, List, Dict
+from typing import TypedDict, List, Dict, Optional, Tuple
+from typing_extensions import NotRequired
 import os
+import re
 
 from langchain_core.messages import HumanMessage
 from utils.llm import get_llm
@@ -13,8 +15,22 @@ class RecipeState(TypedDict):
     recipe_steps: List[str]
     approved: bool
     notes: List[str]
+    notes_applied: NotRequired[int]  # How many notes the last refinement already used
+    ingredients_text: NotRequired[str]  # Joined once by generate_recipe; ingredients never change
 
-llm = get_llm()
+# Regenerating or refining with the same inputs returns the cached recipe (temperature 0)
+llm = get_llm(response_cache=True)
+
+# "Recipe Name: ...\nSteps:\n- ..." in one pass; each non-empty step line without its "- "
+_RECIPE_RE = re.compile(r"Recipe Name:\s*(?P<name>.+?)\s*Steps:\s*(?P<steps>.+)", re.S)
+_STEP_RE = re.compile(r"^[ \t-]*(\S.*?)[ \t]*$", re.M)
+
+def parse_recipe(content: str) -> Optional[Tuple[str, List[str]]]:
+    """Return (recipe_name, recipe_steps), or None if the response isn't in the expected format."""
+    match = _RECIPE_RE.search(content)
+    if match is None:
+        return None
+    return match["name"], _STEP_RE.findall(match["steps"])
 
 def generate_recipe(state: RecipeState) -> RecipeState:
     print("\n🍳 Generating recipe...")
@@ -37,17 +53,15 @@ def generate_recipe(state: RecipeState) -> RecipeState:
     response = llm.invoke([HumanMessage(content=prompt)])
     content = response.content
 
-    try:
-        name_section = content.split("Recipe Name:")[1].split("Steps:")[0].strip()
-        steps_section = content.split("Steps:")[1].strip()
-        recipe_name = name_section
-        recipe_steps = [step.strip().lstrip("- ") for step in steps_section.split("\n") if step.strip()]
-    except:
+    parsed = parse_recipe(content)
+    if parsed:
+        recipe_name, recipe_steps = parsed
+    else:
         recipe_name = "Mixed Ingredient Recipe"
         recipe_steps = ["Combine all ingredients", "Cook until done", "Serve and enjoy"]
 
     print(f"✅ Generated: {recipe_name}")
-    return {**state, "recipe_name": recipe_name, "recipe_steps": recipe_steps}
+    return {**state, "recipe_name": recipe_name, "recipe_steps": recipe_steps, "ingredients_text": ingredients_text}
 
 def review_recipe(state: RecipeState) -> RecipeState:
     print("\n📋 RECIPE REVIEW")
@@ -74,9 +88,15 @@ def refine_recipe(state: RecipeState) -> Dict:
     if state["approved"]:
         return state
 
+    # No new feedback since the last refinement: nothing to apply, skip the LLM call
+    if len(state["notes"]) == state.get("notes_applied", 0):
+        print("\nℹ️ No new feedback - keeping the current recipe.")
+        return state
+
     print("\n🔄 Refining recipe based on feedback...")
-    ingredients_text = ", ".join(state["ingredients"])
+    ingredients_text = state.get("ingredients_text") or ", ".join(state["ingredients"])
     notes_text = "\n".join(state["notes"])
+    steps_block = "\n".join("- " + step for step in state["recipe_steps"])
 
     prompt = f"""
     Please improve this recipe based on the feedback:
@@ -84,7 +104,7 @@ def refine_recipe(state: RecipeState) -> Dict:
     Original Recipe: {state["recipe_name"]}
     Ingredients: {ingredients_text}
     Original Steps:
-    {chr(10).join(f"- {step}" for step in state["recipe_steps"])}
+    {steps_block}
 
     Feedback:
     {notes_text}
@@ -104,21 +124,25 @@ def refine_recipe(state: RecipeState) -> Dict:
     response = llm.invoke([HumanMessage(content=prompt)])
     content = response.content
 
-    try:
-        name_section = content.split("Recipe Name:")[1].split("Steps:")[0].strip()
-        steps_section = content.split("Steps:")[1].strip()
-        recipe_name = name_section
-        recipe_steps = [step.strip().lstrip("- ") for step in steps_section.split("\n") if step.strip()]
-    except:
+    parsed = parse_recipe(content)
+    if parsed:
+        recipe_name, recipe_steps = parsed
+    else:
         recipe_name = state["recipe_name"] + " (Improved)"
         recipe_steps = state["recipe_steps"]
 
+    # Same name and steps again: further rounds won't converge, so accept this version
+    unchanged = recipe_name == state["recipe_name"] and recipe_steps == state["recipe_steps"]
+    if unchanged:
+        print("\n⚠️ Refinement returned the same recipe - accepting it as final.")
+
     print(f"✅ Refined: {recipe_name}")
     return {
         **state,
         "recipe_name": recipe_name,
         "recipe_steps": recipe_steps,
-        "approved": False
+        "approved": unchanged,
+        "notes_applied": len(state["notes"]),
     }
 
 def save_recipe(state: RecipeState) -> RecipeState:
@@ -149,7 +173,10 @@ builder.add_conditional_edges(
     "review_recipe",
     lambda state: "save_recipe" if state["approved"] else "refine_recipe"
 )
-builder.add_edge("refine_recipe", "review_recipe")
+builder.add_conditional_edges(
+    "refine_recipe",
+    lambda state: "save_recipe" if state["approved"] else "review_recipe"
+)
 builder.add_edge("save_recipe", END)
 
 recipe_graph = builder.compile(
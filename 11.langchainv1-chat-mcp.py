@@ -1,13 +1,14 @@
 import pathlib
-import re
 from typing import Dict, Any
 from langchain_openai import ChatOpenAI
 from langchain_mcp_adapters.client import MultiServerMCPClient
+from langchain_mcp_adapters.tools import load_mcp_tools
 import asyncio
+from contextlib import AsyncExitStack
 
-from langgraph.checkpoint.memory import MemorySaver, InMemorySaver
 from langchain_core.tools import tool
-from utils.llm import get_llm
+from utils.llm import get_llm, stable_tools, cached_system_prompt
+from utils.checkpointer import get_checkpointer
 
 from langchain.agents import create_agent
 from langchain.chat_models import init_chat_model
@@ -53,187 +54,266 @@ from utils.tools.memory import clear_memory, set_memory_references, clear_all_me
 
 load_dotenv()
 
+# MCP servers, connected once per process
+MCP_SERVERS = {
+    # "time": {
+    #     "transport": "stdio",
+    #     "command": "npx",
+    #     "args": ["-y", "@theo.foobar/mcp-time"],
+    # },
+    # "msdocs": {
+    #     "transport": "streamable_http",            
+    #     "url": "https://learn.microsoft.com/api/mcp",
+    # },
+    # "langchaindocs": {
+    #     "transport": "streamable_http",            
+    #     "url": "https://docs.langchain.com/mcp",
+    # },
+    # "travel_server": {
+    #     "transport": "streamable_http",
+    #     "url": "https://mcp.kiwi.com"
+    # },
+    # "ai-context": {
+    #     "transport": "stdio",
+    #     "command": "npx",
+    #     "args": ["@ai-coders/context@latest", "mcp"],
+    # },
+    "drift": {
+        "transport": "stdio",
+        "command": "npx",
+        "args": ["-y", "driftdetect-mcp@latest", "mcp"],
+    },            
+
+}
+
+# Tool start/end panels, built once per tool name so markup isn't re-parsed on every call
+_TOOL_PANELS: dict[tuple[str, bool], Panel] = {}
+
+
+def tool_panel(tool_name: str, done: bool) -> Panel:
+    panel = _TOOL_PANELS.get((tool_name, done))
+    if panel is None:
+        if done:
+            panel = Panel(Text.from_markup(f"[bold green]✓ Tool completed: {tool_name}[/bold green]"), border_style="green", padding=(0, 1))
+        else:
+            panel = Panel(Text.from_markup(f"[bold yellow]Calling tool: {tool_name}[/bold yellow]"), border_style="yellow", padding=(0, 1))
+        _TOOL_PANELS[(tool_name, done)] = panel
+    return panel
+
+
+_MCP: dict = {}
+_mcp_lock = asyncio.Lock()
+
+
+async def _load_mcp() -> list:
+    """Open one persistent session per MCP server and load its tools, once.
+
+    Tools loaded from a live session reuse it for every call; tools from
+    `MultiServerMCPClient.get_tools()` open a new session (and respawn the
+    `npx` server) per call.
+    """
+    async with _mcp_lock:
+        if _MCP:
+            return _MCP["tools"]
+
+        mcp_client = MultiServerMCPClient(MCP_SERVERS)
+        sessions = AsyncExitStack()
+        try:
+            server_sessions = [
+                await sessions.enter_async_context(mcp_client.session(server_name))
+                for server_name in MCP_SERVERS
+            ]
+            tool_lists = await asyncio.gather(*(load_mcp_tools(session) for session in server_sessions))
+        except BaseException:
+            # Don't leave the servers that did start running
+            await sessions.aclose()
+            raise
+        # Sorted so the tool schemas sent with every request are byte-identical across runs
+        _MCP.update(
+            client=mcp_client,
+            sessions=sessions,
+            tools=stable_tools([t for tools in tool_lists for t in tools]),
+        )
+        return _MCP["tools"]
+
+
+async def _close_mcp() -> None:
+    """Close the MCP sessions (and their `npx` processes); a later `_load_mcp()` reconnects."""
+    async with _mcp_lock:
+        if _MCP:
+            sessions = _MCP["sessions"]
+            _MCP.clear()
+            await sessions.aclose()
+
+
+# Static instructions (cacheable prefix) and the date line (short uncached suffix)
+SYSTEM_PROMPT = "You are a helpful assistant. Use only tools to answer the user."
+DATE_GUIDELINE = "\nIMPORTANT GUIDELINES FOR DATE-SENSITIVE OPERATIONS: - Today's date is: {today}."
+DATE_FORMAT = "%Y-%m-%d (%A, %B %d, %Y)"
+
+
 async def main():
-    # Get today's date for the system prompt
-    today = datetime.now()
-
-    # Connect to MCP servers
-    mcp_client = MultiServerMCPClient(
-        {
-            # "time": {
-            #     "transport": "stdio",
-            #     "command": "npx",
-            #     "args": ["-y", "@theo.foobar/mcp-time"],
-            # },
-            # "msdocs": {
-            #     "transport": "streamable_http",            
-            #     "url": "https://learn.microsoft.com/api/mcp",
-            # },
-            # "langchaindocs": {
-            #     "transport": "streamable_http",            
-            #     "url": "https://docs.langchain.com/mcp",
-            # },
-            # "travel_server": {
-            #     "transport": "streamable_http",
-            #     "url": "https://mcp.kiwi.com"
-            # },
-            # "ai-context": {
-            #     "transport": "stdio",
-            #     "command": "npx",
-            #     "args": ["@ai-coders/context@latest", "mcp"],
-            # },
-            "drift": {
-                "transport": "stdio",
-                "command": "npx",
-                "args": ["-y", "driftdetect-mcp@latest", "mcp"],
-            },            
-
-        },
-    )
-
-    # Load tools from the MCP servers
-    mcp_tools = await mcp_client.get_tools()
-    print(f"Loaded {len(mcp_tools)} MCP tools: {[t.name for t in mcp_tools]}\n")
-
-    llm = get_llm()
-
-    # Create checkpointer instance so we can reference it for clearing memory
-    checkpointer = InMemorySaver()
-
-    agent = create_agent(
-        system_prompt=f"You are a helpful assistant. IMPORTANT GUIDELINES FOR DATE-SENSITIVE OPERATIONS: - Today's date is: {today.strftime('%Y-%m-%d (%A, %B %d, %Y)')}. Use only tools to answer the user.",
-        model=llm,
-        tools=[*mcp_tools,write_file, read_file, find_file, list_files],  # Unpack MCP tools and add find_file
-        # checkpointer=InMemorySaver(),  # OLD: inline checkpointer
-        checkpointer=checkpointer,  # NEW: use variable for memory clearing
-    )
-
-    # Set memory references so the clear_memory tool can access the checkpointer
-    set_memory_references(checkpointer, "conversation_1")
-
-    # Thread ID for maintaining conversation history
-    thread_id = "conversation_1"
-
-    # Initialize Rich console
-    console = Console()
-
-    # Initialize prompt session with persistent history
-    project_root = pathlib.Path(__file__).parent.resolve()
-    history_file = project_root / ".chat_history_mcp"
-    session = PromptSession(history=FileHistory(str(history_file)))
-
-    # Display welcome banner
-    # OLD welcome banner:
-    # console.print(Panel.fit(
-    #     "[bold cyan]🤖 Assistant Chat Bot[/bold cyan]\n"
-    #     "[dim]Powered by MCP Tools & LangChain[/dim]",
-    #     border_style="cyan"
-    # ))
-    # console.print("[yellow]Type 'quit', 'exit', or 'bye' to end the conversation.[/yellow]\n")
+    # Get today's date for the system prompt; the agent is rebuilt if the chat runs past midnight
+    today = datetime.now().date()
+
+    # Connect to MCP servers (sessions stay open for the whole process)
+    mcp_tools = await _load_mcp()
+    # Checkpointer and MCP sessions are closed in the finally block, also on errors and Ctrl-C,
+    # so the npx server processes never outlive the chat
+    resources = AsyncExitStack()
+    try:
+        print(f"Loaded {len(mcp_tools)} MCP tools: {[t.name for t in mcp_tools]}\n")
+
+        llm = get_llm()
+
+        # Create checkpointer instance so we can reference it for clearing memory
+        # (CHECKPOINT_BACKEND picks memory, sqlite or postgres; closed when the chat ends)
+        checkpointer = await resources.enter_async_context(get_checkpointer())
+
+        def build_agent(day):
+            # Date formatted once per day, so the prompt is byte-identical all day
+            system_prompt = cached_system_prompt(
+                SYSTEM_PROMPT,
+                DATE_GUIDELINE.format(today=day.strftime(DATE_FORMAT)),
+            )
+            return create_agent(
+                system_prompt=system_prompt,
+                model=llm,
+                tools=[*mcp_tools,write_file, read_file, find_file, list_files],  # Unpack MCP tools and add find_file
+                # checkpointer=InMemorySaver(),  # OLD: inline checkpointer
+                checkpointer=checkpointer,  # NEW: use variable for memory clearing
+            )
+
+        agent = build_agent(today)
+
+        # Set memory references so the clear_memory tool can access the checkpointer
+        set_memory_references(checkpointer, "conversation_1")
+
+        # Thread ID for maintaining conversation history
+        thread_id = "conversation_1"
+        # Same config every turn; built once (treat as read-only)
+        config = {"configurable": {"thread_id": thread_id}}
+
+        # Initialize Rich console
+        console = Console()
+
+        # Initialize prompt session with persistent history
+        project_root = pathlib.Path(__file__).parent.resolve()
+        history_file = project_root / ".chat_history_mcp"
+        session = PromptSession(history=FileHistory(str(history_file)))
+
+        # Display welcome banner
+        # OLD welcome banner:
+        # console.print(Panel.fit(
+        #     "[bold cyan]🤖 Assistant Chat Bot[/bold cyan]\n"
+        #     "[dim]Powered by MCP Tools & LangChain[/dim]",
+        #     border_style="cyan"
+        # ))
+        # console.print("[yellow]Type 'quit', 'exit', or 'bye' to end the conversation.[/yellow]\n")
     
-    # NEW welcome banner with /clear command:
-    console.print(Panel.fit(
-        "[bold cyan]🤖 Assistant Chat Bot[/bold cyan]\n"
-        "[dim]Powered by MCP Tools & LangChain[/dim]\n\n"
-        "[yellow]Commands:[/yellow]\n"
-        "  • [cyan]/clear[/cyan] - Clear memory and start fresh\n"
-        "  • [cyan]quit/exit/bye[/cyan] - End conversation",
-        border_style="cyan"
-    ))
-
-    # Display loaded tools in a nice table
-    tools_table = Table(title="[bold green]Available Tools[/bold green]", show_header=True)
-    tools_table.add_column("Tool Name", style="cyan")
-    tools_table.add_column("Count", style="magenta")
+        # NEW welcome banner with /clear command:
+        console.print(Panel.fit(
+            "[bold cyan]🤖 Assistant Chat Bot[/bold cyan]\n"
+            "[dim]Powered by MCP Tools & LangChain[/dim]\n\n"
+            "[yellow]Commands:[/yellow]\n"
+            "  • [cyan]/clear[/cyan] - Clear memory and start fresh\n"
+            "  • [cyan]quit/exit/bye[/cyan] - End conversation",
+            border_style="cyan"
+        ))
+
+        # Display loaded tools in a nice table
+        tools_table = Table(title="[bold green]Available Tools[/bold green]", show_header=True)
+        tools_table.add_column("Tool Name", style="cyan")
+        tools_table.add_column("Count", style="magenta")
     
-    mcp_tool_names = ', '.join([t.name for t in mcp_tools])
-    tools_table.add_row("MCP Tools", f"{len(mcp_tools)} ({mcp_tool_names})")
-    tools_table.add_row("Custom Tools", "(write_file)")
+        mcp_tool_names = ', '.join([t.name for t in mcp_tools])
+        tools_table.add_row("MCP Tools", f"{len(mcp_tools)} ({mcp_tool_names})")
+        tools_table.add_row("Custom Tools", "(write_file)")
     
-    console.print(tools_table)
-    console.print()
+        console.print(tools_table)
+        console.print()
 
-    # Chat loop
-    while True:
-        # Get user input with prompt_toolkit (supports arrow up/down history)
-        try:
-            user_input = await asyncio.get_event_loop().run_in_executor(
-                None,
-                lambda: session.prompt(HTML('\n<ansigreen><b>You:</b></ansigreen> ')).strip()
-            )
-        except (KeyboardInterrupt, EOFError):
-            console.print("\n[yellow]👋 Goodbye![/yellow]")
-            break
+        # Chat loop
+        while True:
+            # Get user input with prompt_toolkit (supports arrow up/down history)
+            try:
+                user_input = (await session.prompt_async(HTML('\n<ansigreen><b>You:</b></ansigreen> '))).strip()
+            except (KeyboardInterrupt, EOFError):
+                console.print("\n[yellow]👋 Goodbye![/yellow]")
+                break
         
-        # Check for exit commands
-        if user_input.lower() in ['quit', 'exit', 'bye', 'q']:
-            console.print("\n[bold green]👋 Thanks for chatting! Goodbye![/bold green]")
-            break
+            # Check for exit commands
+            if user_input.lower() in ['quit', 'exit', 'bye', 'q']:
+                console.print("\n[bold green]👋 Thanks for chatting! Goodbye![/bold green]")
+                break
         
-        # Check for /clear command to clear memory
-        if user_input.lower() == '/clear':
-            result = clear_all_memory()
-            console.print()
-            console.rule("[bold magenta]🧹 Memory Cleared[/bold magenta]", style="magenta")
-            console.print("[bold green]✅ All conversation context has been erased![/bold green]")
-            console.print("[dim]Starting fresh - the AI will not remember anything from before.[/dim]")
-            console.rule(style="magenta")
-            console.print()
-            continue
+            # Check for /clear command to clear memory
+            if user_input.lower() == '/clear':
+                result = clear_all_memory()
+                # Database savers have no in-memory storage to wipe; delete the thread instead
+                if not hasattr(checkpointer, "storage"):
+                    await checkpointer.adelete_thread(thread_id)
+                console.print()
+                console.rule("[bold magenta]🧹 Memory Cleared[/bold magenta]", style="magenta")
+                console.print("[bold green]✅ All conversation context has been erased![/bold green]")
+                console.print("[dim]Starting fresh - the AI will not remember anything from before.[/dim]")
+                console.rule(style="magenta")
+                console.print()
+                continue
         
-        # Skip empty inputs
-        if not user_input:
-            continue
+            # Skip empty inputs
+            if not user_input:
+                continue
         
-        # Create human message
-        human_msg = HumanMessage(user_input)
+            # Day rolled over: refresh the date in the system prompt
+            if datetime.now().date() != today:
+                today = datetime.now().date()
+                agent = build_agent(today)
+
+            # Create human message
+            human_msg = HumanMessage(user_input)
         
-        # Display bot response header
-        console.print()
+            # Display bot response header
+            console.print()
         
-        # Stream the agent's response with live rendering
-        full_response = ""
-        current_tool = None
+            # Stream the agent's response with live rendering
+            full_response = ""
+            current_tool = None
         
-        async for event in agent.astream_events(
-            {"messages": [human_msg]},
-            config={"configurable": {"thread_id": thread_id}},
-            version="v2"
-        ):
-            kind = event["event"]
+            async for event in agent.astream_events(
+                {"messages": [human_msg]},
+                config=config,
+                version="v2"
+            ):
+                kind = event["event"]
             
-            # Display streaming tokens from the LLM
-            if kind == "on_chat_model_stream":
-                content = event["data"]["chunk"].content
-                if content:
-                    if not full_response:
-                        # First chunk - print the bot label
-                        console.print("[bold green]🤖 Bot:[/bold green] ", end="")
-                    console.print(content, end="", style="white")
-                    full_response += content
+                # Display streaming tokens from the LLM
+                if kind == "on_chat_model_stream":
+                    content = event["data"]["chunk"].content
+                    if content:
+                        if not full_response:
+                            # First chunk - print the bot label
+                            console.print("[bold green]🤖 Bot:[/bold green] ", end="")
+                        console.print(content, end="", style="white")
+                        full_response += content
             
-            # Show when tools are being called
-            elif kind == "on_tool_start":
-                tool_name = event["name"]
-                current_tool = tool_name
-                console.print()
-                console.print(Panel(
-                    f"[bold yellow]Calling tool: {tool_name}[/bold yellow]",
-                    border_style="yellow",
-                    padding=(0, 1)
-                ))
+                # Show when tools are being called
+                elif kind == "on_tool_start":
+                    tool_name = event["name"]
+                    current_tool = tool_name
+                    console.print()
+                    console.print(tool_panel(tool_name, done=False))
             
-            # Show tool results
-            elif kind == "on_tool_end":
-                tool_name = event["name"]
-                console.print(Panel(
-                    f"[bold green]✓ Tool completed: {tool_name}[/bold green]",
-                    border_style="green",
-                    padding=(0, 1)
-                ))
-                console.print()
+                # Show tool results
+                elif kind == "on_tool_end":
+                    tool_name = event["name"]
+                    console.print(tool_panel(tool_name, done=True))
+                    console.print()
         
-        console.print("\n")  # Add newline after response
+            console.print("\n")  # Add newline after response
+    finally:
+        await resources.aclose()
+        await _close_mcp()
 
 
 # Run the async main function
@@ -1,13 +1,16 @@
+import asyncio
 import os
 import uuid
 from deepagents import create_deep_agent
 from deepagents.backends import CompositeBackend, StateBackend, StoreBackend
 from langgraph.store.memory import InMemoryStore
-from langgraph.checkpoint.memory import MemorySaver
+from langchain_core.messages import HumanMessage
+from langchain_core.tools import tool
 
 from utils.tools.get_web_links import get_web_links
 from utils.tools.get_web_data import get_web_data
 from utils.llm import get_llm
+from utils.checkpointer import get_checkpointer
 
 
 def summarize_findings(text: str):
@@ -15,7 +18,7 @@ def summarize_findings(text: str):
     return f"Summary: {text[:200]}..."
 
 # Set up persistent storage for long-term memory
-checkpointer = MemorySaver()  # Use PostgresStore in production
+# Checkpointer comes from get_checkpointer() (CHECKPOINT_BACKEND: memory, sqlite or postgres)
 store = InMemoryStore()  # Use PostgresStore in production
 
 # Create a backend that routes /memories/ to persistent storage
@@ -54,29 +57,59 @@ analyst_subagent = {
 
 llm = get_llm()
 
-# Create the main supervisor agent
-main_agent = create_deep_agent(
+# Standalone research specialist for parallel fan-out (same prompt, tools and /memories/ store)
+research_runner = create_deep_agent(
     model=llm,
-    subagents=[research_subagent, analyst_subagent],
-    system_prompt="""You are a research coordinator. Your job is to:
+    tools=research_subagent["tools"],
+    system_prompt=research_subagent["system_prompt"],
+    backend=make_backend,
+    store=store,
+    name="research-runner"
+)
+
+
+@tool(parse_docstring=True)
+async def fan_out_research(queries: list[str]) -> str:
+    """Research several independent subtopics at the same time.
+
+    Args:
+        queries: Independent research questions, one per subtopic.
+    """
+    # Runs concurrently: latency is the slowest query, not the sum of all of them
+    results = await asyncio.gather(*(
+        research_runner.ainvoke({"messages": [HumanMessage(query)]}) for query in queries
+    ))
+    return "\n\n".join(
+        f"## {query}\n{result['messages'][-1].content}" for query, result in zip(queries, results)
+    )
+
+# Create the main supervisor agent
+def make_main_agent(checkpointer):
+    return create_deep_agent(
+        model=llm,
+        tools=[fan_out_research],
+        subagents=[research_subagent, analyst_subagent],
+        system_prompt="""You are a research coordinator. Your job is to:
     1. Delegate research tasks to the research-specialist
-    2. Ask the analyst to interpret findings
+       - When a question splits into independent subtopics, call fan_out_research once
+         with a list of subqueries instead of delegating them one by one
+    2. Ask the analyst to interpret findings (after all research has returned)
     3. Read /memories/research_notes.txt and /memories/insights.txt to remember previous work
     4. Build on past research to provide comprehensive answers
     
     IMPORTANT: Always check what we've learned before in /memories/ before starting new research!""",
-    backend=make_backend,
-    store=store,
-    checkpointer=checkpointer,
-    name="main-agent"
-)
+        backend=make_backend,
+        store=store,
+        checkpointer=checkpointer,
+        name="main-agent"
+    )
 
 # Example usage: Multi-turn conversation with persistent memory
-def run_research_workflow():
+async def run_research_workflow(main_agent):
     # Thread 1: Initial research (different thread_id = new conversation)
     thread_1 = {"configurable": {"thread_id": str(uuid.uuid4())}}
     
-    result1 = main_agent.invoke({
+    result1 = await main_agent.ainvoke({
         "messages": [{
             "role": "user",
             "content": "Research quantum computing trends and save your findings"
@@ -91,7 +124,7 @@ def run_research_workflow():
     # The agent can still access /memories/ from Thread 1!
     thread_2 = {"configurable": {"thread_id": str(uuid.uuid4())}}
     
-    result2 = main_agent.invoke({
+    result2 = await main_agent.ainvoke({
         "messages": [{
             "role": "user",
             "content": "What did we learn about quantum computing? Build on our previous research."
@@ -103,7 +136,7 @@ def run_research_workflow():
     print()
     
     # Thread 3: Continue the same conversation
-    result3 = main_agent.invoke({
+    result3 = await main_agent.ainvoke({
         "messages": [{
             "role": "user",
             "content": "Now research quantum computing applications in finance"
@@ -113,6 +146,10 @@ def run_research_workflow():
     print("Thread 3 Result (same conversation):")
     print(result3["messages"][-1].content)
 
+async def main():
+    async with get_checkpointer() as checkpointer:
+        await run_research_workflow(make_main_agent(checkpointer))
+
 # Run the workflow
 if __name__ == "__main__":
-    run_research_workflow()
\ No newline at end of file
+    asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,48 @@
+"""The raw-bytes search path must give the same hits as the line-by-line scan."""
+import re
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from utils.tools.filesystem import _MMAP_THRESHOLD, _bytes_pattern, _search_file, _search_lines
+
+TEXT = 'hello world\nsay hello\nHELLO again\nhello\n"quoted" text\nend hello'
+
+PATTERNS = [
+    r"hello\n",
+    r"\Ahello",
+    r"hello\Z",
+    r"hello$",
+    r"^hello",
+    r"hello[^x]",
+    r'"[^"]*"',
+    r"hello\x0a",
+    r"(?-i:hello)",
+    r"\bhello\b",
+    "hello",
+]
+
+
+@pytest.fixture(params=["small", "mapped", "crlf"])
+def sample(request, tmp_path):
+    path = tmp_path / "one.txt"
+    text = TEXT * (_MMAP_THRESHOLD // len(TEXT) + 1) if request.param == "mapped" else TEXT
+    if request.param == "crlf":
+        text = text.replace("\n", "\r\n")
+    path.write_bytes(text.encode())
+    return str(path)
+
+
+@pytest.mark.parametrize("flags", [0, re.IGNORECASE])
+@pytest.mark.parametrize("pattern", PATTERNS)
+def test_matches_line_scan(sample, pattern, flags):
+    text_re = re.compile(pattern, flags)
+    expected = _search_lines(sample, text_re, 10**6)
+    assert _search_file(sample, text_re, _bytes_pattern(pattern, flags), 10**6) == expected
+
+
+def test_anchors_match_every_line(sample):
+    text_re = re.compile(r"\Ahello", re.IGNORECASE)
+    hits = _search_file(sample, text_re, _bytes_pattern(text_re.pattern, re.IGNORECASE), 3)
+    assert [line for _, line in hits] == ["hello world", "HELLO again", "hello"]
@@ -0,0 +1,76 @@
+"""Checkpointer helpers for keeping state persistence off the chat hot path."""
+import os
+from contextlib import asynccontextmanager
+
+from langgraph.checkpoint.memory import InMemorySaver
+
+from .config import checkpoint_config
+
+
+@asynccontextmanager
+async def sqlite_checkpointer(path: str):
+    """Persist checkpoints to a SQLite file instead of growing Python dicts.
+
+    Async (AsyncSqliteSaver on an aiosqlite connection), so agents driven with
+    `astream`/`astream_events` can use it; use as `async with sqlite_checkpointer(path) as saver`.
+    WAL plus memory-mapped I/O keeps hot pages in the OS page cache, and the
+    conversation survives restarts. Needs `langgraph-checkpoint-sqlite` and `aiosqlite`
+    (project dependencies); without them this falls back to an InMemorySaver.
+    """
+    try:
+        import aiosqlite
+        from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+    except ImportError:
+        yield InMemorySaver()
+        return
+
+    conn = await aiosqlite.connect(os.path.expanduser(path))
+    try:
+        await conn.execute("PRAGMA journal_mode=WAL")
+        await conn.execute("PRAGMA synchronous=NORMAL")
+        await conn.execute("PRAGMA mmap_size=268435456")
+        yield AsyncSqliteSaver(conn)
+    finally:
+        await conn.close()
+
+
+@asynccontextmanager
+async def get_checkpointer(backend: str | None = None):
+    """Async checkpointer selected by `CHECKPOINT_BACKEND`; use as `async with get_checkpointer() as saver`.
+
+    - memory: InMemorySaver (default; lost on exit)
+    - sqlite: AsyncSqliteSaver on `CHECKPOINT_SQLITE_PATH`
+    - postgres: AsyncPostgresSaver on `PG_URL` (optional: `pip install "agent-playground[postgres]"`)
+
+    The database backends keep checkpoints on disk, indexed by thread_id, and
+    do their I/O without blocking the event loop.
+    """
+    backend = backend or checkpoint_config.backend
+    if backend == "sqlite":
+        try:
+            from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+        except ImportError as e:
+            raise ImportError(
+                "CHECKPOINT_BACKEND=sqlite needs `pip install langgraph-checkpoint-sqlite aiosqlite`"
+            ) from e
+
+        async with AsyncSqliteSaver.from_conn_string(os.path.expanduser(checkpoint_config.sqlite_path)) as saver:
+            yield saver
+    elif backend == "postgres":
+        try:
+            from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+        except ImportError as e:
+            raise ImportError(
+                'CHECKPOINT_BACKEND=postgres needs `pip install "agent-playground[postgres]"` '
+                '(langgraph-checkpoint-postgres and psycopg)'
+            ) from e
+
+        if not checkpoint_config.postgres_url:
+            raise ValueError("CHECKPOINT_BACKEND=postgres needs PG_URL")
+        async with AsyncPostgresSaver.from_conn_string(checkpoint_config.postgres_url) as saver:
+            await saver.setup()
+            yield saver
+    elif backend == "memory":
+        yield InMemorySaver()
+    else:
+        raise ValueError(f"Unknown CHECKPOINT_BACKEND '{backend}' (expected memory, sqlite or postgres)")
@@ -5,12 +5,39 @@ from dataclasses import dataclass
 
 load_dotenv()
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class LLMConfig:
     model: str = os.getenv("LLM_MODEL", "qwen/qwen3-4b-2507")
     base_url: str = os.getenv("LLM_BASE_URL", "http://127.0.0.1:1234/v1")
     api_key: str = os.getenv("LLM_API_KEY", "")
     temperature: float = float(os.getenv("LLM_TEMPERATURE", "0.0"))
+    # Routing hint for OpenAI prompt caching; keeps repeated prefixes on the same cache
+    prompt_cache_key: str = os.getenv("LLM_PROMPT_CACHE_KEY", "")
+    # Mark system prompts with Anthropic-style cache_control (e.g. Claude/Bedrock behind an OpenAI-compatible proxy)
+    cache_control: bool = os.getenv("LLM_CACHE_CONTROL", "").lower() in ("1", "true", "yes")
+    # Embeddings model for semantic response caches; empty disables similarity matching
+    embedding_model: str = os.getenv("LLM_EMBEDDING_MODEL", "")
+    # llama.cpp server: ask it to keep each conversation's KV cache (`cache_prompt`) between requests
+    cache_prompt: bool = os.getenv("LLM_CACHE_PROMPT", "").lower() in ("1", "true", "yes")
+    # Client-side token bucket for concurrent/batched calls; 0 means unlimited
+    requests_per_second: float = float(os.getenv("LLM_REQUESTS_PER_SECOND", "0"))
+    # Exact-match response cache for every temperature 0 model; off by default
+    # (scripts opt in per model with get_llm(response_cache=True))
+    response_cache: bool = os.getenv("LLM_RESPONSE_CACHE", "").lower() in ("1", "true", "yes")
+    # Also keep cached responses on disk (e.g. .llm_cache); empty keeps them in memory only
+    response_cache_dir: str = os.getenv("LLM_RESPONSE_CACHE_DIR", "")
+    # Sub-agent delegations allowed in flight at once when a model fans out several task calls
+    subagent_concurrency: int = int(os.getenv("SUBAGENT_MAX_CONCURRENCY", "4"))
+    # Files per summarization sub-agent call; 1 keeps one file per prompt (best prompt-cache reuse)
+    subagent_batch_size: int = int(os.getenv("SUBAGENT_BATCH_SIZE", "1"))
+
+@dataclass
+class CheckpointConfig:
+    # memory (default), sqlite or postgres
+    backend: str = os.getenv("CHECKPOINT_BACKEND", "memory").lower()
+    sqlite_path: str = os.getenv("CHECKPOINT_SQLITE_PATH", "checkpoints.db")
+    postgres_url: str = os.getenv("PG_URL", "")
 
-# Singleton instance
+# Singleton instances
 llm_config = LLMConfig()
+checkpoint_config = CheckpointConfig()
@@ -1,5 +1,9 @@
 """Shared Rich console configuration."""
+import re
+
 from rich.console import Console
+from rich.markdown import Markdown
+from rich.text import Text
 from rich.theme import Theme
 
 custom_theme = Theme({
@@ -13,3 +17,55 @@ custom_theme = Theme({
 
 # specific global console instance to be used everywhere
 console = Console(theme=custom_theme)
+
+
+def progress(message: str) -> None:
+    """Print a status line (delegations, cache hits) in the info style.
+
+    Skipped when output is not a terminal (piped or batch runs), and printed
+    without Rich's highlighter, so concurrent sub-agents don't queue on
+    rendering noise.
+    """
+    if console.is_terminal:
+        console.print(message, style="info", highlight=False)
+
+
+# Cheap check for anything Markdown would render differently from plain text
+_MARKDOWN_HINT = re.compile(r"[*_`#>|\[]|^\s*(?:[-+]|\d+\.)\s", re.MULTILINE)
+
+
+class StreamingMarkdown:
+    """Live renderable for a response that grows token by token.
+
+    Append tokens with `append()`; parsing happens only when Live refreshes
+    (a few times a second) instead of once per token, and is skipped entirely
+    while the text contains no Markdown syntax.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._rendered_len = -1
+        self._renderable = Text()
+
+    def append(self, chunk: str) -> None:
+        self.text += chunk
+
+    def __rich__(self):
+        if len(self.text) != self._rendered_len:
+            self._rendered_len = len(self.text)
+            if not _MARKDOWN_HINT.search(self.text):
+                self._renderable = Text(self.text)
+            else:
+                self._renderable = Markdown(self.text)
+        return self._renderable
+
+
+def content_text(content) -> str:
+    """Text of message content: a plain string, or the text blocks of a content-block list."""
+    if isinstance(content, str):
+        return content
+    return "".join(
+        block if isinstance(block, str) else block.get("text", "")
+        for block in content
+        if isinstance(block, str) or block.get("type") == "text"
+    )
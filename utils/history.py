@@ -0,0 +1,25 @@
+"""Prompt history helpers for the interactive chat loops."""
+import atexit
+from concurrent.futures import ThreadPoolExecutor
+
+from prompt_toolkit.history import FileHistory
+
+
+class BackgroundFileHistory(FileHistory):
+    """FileHistory that appends new entries on a background thread.
+
+    Submitting a prompt no longer waits on the disk write; pending writes are
+    flushed when the interpreter exits.
+    """
+
+    def __init__(self, filename: str):
+        super().__init__(filename)
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history-writer")
+        atexit.register(self.flush)
+
+    def store_string(self, string: str) -> None:
+        self._writer.submit(super().store_string, string)
+
+    def flush(self) -> None:
+        """Wait for all queued history writes to finish."""
+        self._writer.shutdown(wait=True)
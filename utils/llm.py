@@ -1,16 +1,184 @@
 """LLM factory for creating configured language models."""
-from langchain_openai import ChatOpenAI
+from functools import lru_cache
+
+import httpx
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.messages.utils import count_tokens_approximately
+from langchain_core.rate_limiters import InMemoryRateLimiter
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 from .config import llm_config
+from .llm_cache import LLMCache
+
+_response_cache: LLMCache | None = None
+_rate_limiter: InMemoryRateLimiter | None = None
+_http_async_client: httpx.AsyncClient | None = None
+
+
+def get_response_cache() -> LLMCache:
+    """Process-wide exact-match response cache shared by every `get_llm()` model."""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = LLMCache(llm_config.response_cache_dir or None)
+    return _response_cache
+
+
+def get_rate_limiter() -> InMemoryRateLimiter | None:
+    """Token bucket shared by every `get_llm()` model, or None when LLM_REQUESTS_PER_SECOND is unset."""
+    global _rate_limiter
+    if _rate_limiter is None and llm_config.requests_per_second > 0:
+        _rate_limiter = InMemoryRateLimiter(
+            requests_per_second=llm_config.requests_per_second,
+            max_bucket_size=max(1, int(llm_config.requests_per_second)),
+        )
+    return _rate_limiter
+
+
+def get_http_async_client() -> httpx.AsyncClient:
+    """Connection pool shared by every `get_llm()` model, so turns reuse keep-alive connections."""
+    global _http_async_client
+    if _http_async_client is None:
+        _http_async_client = httpx.AsyncClient(limits=httpx.Limits(max_keepalive_connections=20))
+    return _http_async_client
+
 
 def get_llm(**overrides) -> ChatOpenAI:
     """Get a configured LLM instance.
+
+    Memoized on the resolved settings: `get_llm()` and `get_llm(temperature=0.0)`
+    return the same client when 0.0 is the configured temperature, so sub-agents
+    and scripts share one `ChatOpenAI` and its connection pool.
     
     Args:
-        **overrides: Override any config values (model, temperature, etc.)
+        **overrides: Override any config values (model, temperature, etc.).
+            `id_slot` pins requests to one llama.cpp server slot (e.g. one per thread)
+            when LLM_CACHE_PROMPT is enabled.
+            `response_cache=True` answers repeated temperature 0 requests from the
+            exact-match cache even when LLM_RESPONSE_CACHE is off.
     """
-    return ChatOpenAI(
+    cache_prompt = overrides.get("cache_prompt", llm_config.cache_prompt)
+    return _build_llm(
         model=overrides.get("model", llm_config.model),
         base_url=overrides.get("base_url", llm_config.base_url),
-        api_key=overrides.get("api_key", llm_config.api_key),
+        api_key=str(overrides.get("api_key", llm_config.api_key)),
         temperature=overrides.get("temperature", llm_config.temperature),
+        prompt_cache_key=overrides.get("prompt_cache_key", llm_config.prompt_cache_key),
+        cache_prompt=bool(cache_prompt),
+        id_slot=overrides.get("id_slot") if cache_prompt else None,
+        response_cache=bool(overrides.get("response_cache", llm_config.response_cache)),
+    )
+
+
+@lru_cache(maxsize=32)
+def _build_llm(
+    model: str,
+    base_url: str,
+    api_key: str,
+    temperature: float,
+    prompt_cache_key: str,
+    cache_prompt: bool,
+    id_slot: int | None,
+    response_cache: bool,
+) -> ChatOpenAI:
+    extra_body = None
+    if cache_prompt:
+        extra_body = {"cache_prompt": True}
+        if id_slot is not None:
+            extra_body["id_slot"] = id_slot
+    # Deterministic calls repeat exactly, so identical requests are answered from cache
+    cache = get_response_cache() if response_cache and temperature == 0 else None
+    return ChatOpenAI(
+        model=model,
+        base_url=base_url,
+        api_key=api_key,
+        temperature=temperature,
+        cache=cache,
+        rate_limiter=get_rate_limiter(),
+        http_async_client=get_http_async_client(),
+        # Only sent when configured, so local OpenAI-compatible servers are unaffected
+        model_kwargs={"prompt_cache_key": prompt_cache_key} if prompt_cache_key else {},
+        extra_body=extra_body,
+    )
+
+
+def get_embeddings() -> OpenAIEmbeddings | None:
+    """Embeddings client on the configured endpoint, or None when LLM_EMBEDDING_MODEL is unset."""
+    if not llm_config.embedding_model:
+        return None
+    return OpenAIEmbeddings(
+        model=llm_config.embedding_model,
+        base_url=llm_config.base_url,
+        api_key=llm_config.api_key,
+        # Local OpenAI-compatible servers expect raw text, not tiktoken ids
+        check_embedding_ctx_length=False,
     )
+
+
+def cached_system_prompt(prompt: str, suffix: str = "") -> str | SystemMessage:
+    """Wrap a static system prompt so providers can reuse its prefix across turns.
+
+    With `LLM_CACHE_CONTROL` enabled the prompt becomes a content block carrying
+    `cache_control: {"type": "ephemeral"}`, followed by an uncached block for
+    `suffix` (per-turn state); otherwise the plain string is returned, since
+    OpenAI caches matching prefixes automatically.
+    """
+    if not llm_config.cache_control:
+        return prompt + suffix
+    blocks = [{"type": "text", "text": prompt, "cache_control": {"type": "ephemeral"}}]
+    if suffix:
+        blocks.append({"type": "text", "text": suffix})
+    return SystemMessage(content=blocks)
+
+
+async def aprewarm(llm, system_prompt: str | SystemMessage, tools: list | None = None) -> None:
+    """Send a 1-token request so the provider caches the system prompt + tool prefix.
+
+    Pass the same tools (same order) the agent binds so the warmed prefix matches
+    real requests. Failures are ignored; warming is only an optimization.
+    """
+    model = llm.bind_tools(tools) if tools else llm
+    system = system_prompt if isinstance(system_prompt, SystemMessage) else SystemMessage(system_prompt)
+    try:
+        await model.ainvoke([system, HumanMessage("ok")], max_tokens=1)
+    except Exception:
+        pass
+
+
+def stable_tools(tools: list) -> list:
+    """Return tools de-duplicated and sorted by name.
+
+    Tool schemas are serialized into every request right after the system
+    prompt, so their order must not depend on MCP server response order or
+    list construction; otherwise the prompt prefix changes and provider
+    caches (OpenAI automatic caching, Anthropic `cache_control`) miss.
+    """
+    by_name = {}
+    for t in tools:
+        by_name.setdefault(getattr(t, "name", None) or getattr(t, "__name__", repr(t)), t)
+    return [by_name[name] for name in sorted(by_name)]
+
+
+def cached_token_counter(counter=count_tokens_approximately, max_entries: int = 4096):
+    """Token counter for `SummarizationMiddleware(token_counter=...)` that remembers per-message counts.
+
+    The middleware counts the whole history before every model call; keyed by
+    message id, only messages added since the last call are tokenized. Messages
+    without an id are counted every time.
+    """
+    counts: dict[str, int] = {}
+
+    def count(messages) -> int:
+        total = 0
+        for message in messages:
+            key = getattr(message, "id", None)
+            if key is None:
+                total += counter([message])
+                continue
+            n = counts.get(key)
+            if n is None:
+                if len(counts) >= max_entries:
+                    counts.pop(next(iter(counts)))
+                n = counts[key] = counter([message])
+            total += n
+        return total
+
+    return count
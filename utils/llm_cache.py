@@ -0,0 +1,120 @@
+"""Exact-match response cache for deterministic (temperature 0) model calls."""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Protocol
+
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumpd, loads
+
+from .serialization import to_json
+
+
+class CacheBackend(Protocol):
+    """Storage for serialized responses keyed by hash."""
+
+    def get(self, key: str) -> str | None: ...
+
+    def set(self, key: str, value: str) -> None: ...
+
+    def clear(self) -> None: ...
+
+
+class MemoryBackend:
+    """LRU of at most `max_entries` responses; the least recently used is evicted first."""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._data: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class FileBackend:
+    """One JSON file per response under `directory`, so hits survive restarts."""
+
+    def __init__(self, directory: str = ".llm_cache"):
+        self.directory = os.path.expanduser(directory)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> str | None:
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def set(self, key: str, value: str) -> None:
+        # Write then rename so a concurrent reader never sees a partial file
+        tmp = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(value)
+        os.replace(tmp, self._path(key))
+
+    def clear(self) -> None:
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                os.remove(os.path.join(self.directory, name))
+
+
+class LLMCache(BaseCache):
+    """LangChain model cache (`ChatOpenAI(cache=...)`) over a memory + optional file backend.
+
+    LangChain hands over the serialized messages (`prompt`) and the model
+    parameters including bound tools (`llm_string`); the key is their sha256,
+    so any change to model, temperature, messages or tools is a miss.
+    """
+
+    def __init__(self, directory: str | None = None):
+        self.memory = MemoryBackend()
+        self.disk = FileBackend(directory) if directory else None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\0{prompt}".encode()).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str):
+        key = self.make_key(prompt, llm_string)
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.set(key, value)
+        return loads(value) if value is not None else None
+
+    def update(self, prompt: str, llm_string: str, return_val) -> None:
+        key = self.make_key(prompt, llm_string)
+        # dumpd builds plain dicts; to_json encodes them with orjson when it is installed
+        value = to_json(dumpd(list(return_val)), indent=False)
+        with self._lock:
+            self.memory.set(key, value)
+            if self.disk is not None:
+                self.disk.set(key, value)
+
+    def clear(self, **kwargs) -> None:
+        with self._lock:
+            self.memory.clear()
+            if self.disk is not None:
+                self.disk.clear()
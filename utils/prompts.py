@@ -1,5 +1,16 @@
-"""Prompt templates for all agents."""
-from datetime import datetime
+"""Prompt templates for all agents.
+
+Every prompt is a plain `str` constant assembled once at import, so each
+agent build and each request sends byte-identical text.
+"""
+
+__all__ = [
+    "PLANNING_SECTION",
+    "FILE_SEARCH_AGENT_PROMPT",
+    "SUMMARIZATION_AGENT_PROMPT",
+    "DEEP_AGENT_INSTRUCTIONS",
+    "get_deep_agent_instructions",
+]
 
 # Shared components
 PLANNING_SECTION = """
@@ -32,9 +43,10 @@ For each file:
 
 Be concise but informative. Focus on what's most important in each file."""
 
-# Main agent prompt generator
-def get_deep_agent_instructions() -> str:
-    return f"""You are a Deep Agent File System Assistant. Today's date is {datetime.now().strftime("%B %d, %Y")}.
+# Main agent prompt. Kept free of dynamic values (dates, todos, files) so the
+# prefix is byte-identical on every request and provider prompt caches hit;
+# the date comes from the `get_today` tool, todos/files from state.
+DEEP_AGENT_INSTRUCTIONS = f"""You are a Deep Agent File System Assistant.
 
 You help users with file system tasks including:
 - Searching and listing files
@@ -51,6 +63,7 @@ For specialized tasks, you can delegate to sub-agents:
 - **summarization-agent**: For reading and summarizing file contents
 
 Delegate when tasks benefit from isolated focus. Each sub-agent has clean context.
+When several files need summaries, prefer `summarize_files`: it summarizes each file on its own, in parallel.
 
 ## File Operations
 
@@ -66,4 +79,14 @@ Delegate when tasks benefit from isolated focus. Each sub-agent has clean contex
 3. Delegate appropriately to sub-agents
 4. Save final results to disk when requested
 5. Be concise but helpful in responses
+6. Use `get_today` whenever you need today's date
 """
+
+
+def get_deep_agent_instructions() -> str:
+    """Main agent system prompt, built once at import.
+
+    Any per-request text (dates, user names) must go after it, never before,
+    or the cached prompt prefix changes on every call.
+    """
+    return DEEP_AGENT_INSTRUCTIONS
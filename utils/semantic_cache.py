@@ -0,0 +1,253 @@
+"""Prompt-level response cache: exact match first, then embedding similarity."""
+import math
+import re
+import threading
+
+from .llm import get_embeddings
+
+try:
+    import numpy as np
+except ImportError:  # Fall back to a plain-Python cosine scan
+    np = None
+
+_WS_RE = re.compile(r"\s+")
+
+
+def prompt_text(input) -> str:
+    """Flatten a prompt (str, message list, or {"messages": [...]}) into normalized text."""
+    if isinstance(input, dict) and "messages" in input:
+        input = input["messages"]
+    if isinstance(input, str):
+        parts = [input]
+    else:
+        parts = []
+        for m in input:
+            role = m.get("role", "") if isinstance(m, dict) else getattr(m, "type", "")
+            content = m.get("content", "") if isinstance(m, dict) else getattr(m, "content", "")
+            parts.append(f"{role}: {content}")
+    return _WS_RE.sub(" ", "\n".join(parts)).strip().lower()
+
+
+def cosine_similarity(a: list[float], b: list[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class SemanticCache:
+    """Maps prompts to earlier results.
+
+    Identical (normalized) prompts always hit. When an embeddings model is
+    configured (`LLM_EMBEDDING_MODEL`), prompts whose embedding has cosine
+    similarity >= `threshold` with a stored one hit as well.
+    """
+
+    def __init__(self, threshold: float = 0.95, embeddings=None, max_entries: int = 1024):
+        self.threshold = threshold
+        self.embeddings = embeddings if embeddings is not None else get_embeddings()
+        self.max_entries = max_entries
+        self._exact: dict[str, object] = {}
+        # Embedded entries form a ring of max_entries slots; once full the oldest is overwritten.
+        # With numpy the vectors are rows of one float32 matrix, L2-normalized, so a lookup
+        # is a single matrix-vector product; otherwise they are kept as lists.
+        self._matrix = None
+        self._vectors: list[list[float]] = []
+        self._values: list[object] = []
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def _nearest(self, vector: list[float]):
+        with self._lock:
+            if not self._values:
+                return None
+            if np is None:
+                best, best_score = None, self.threshold
+                for stored, value in zip(self._vectors, self._values):
+                    score = cosine_similarity(vector, stored)
+                    if score >= best_score:
+                        best, best_score = value, score
+                return best
+            query = np.asarray(vector, dtype=np.float32)
+            norm = np.linalg.norm(query)
+            if not norm:
+                return None
+            scores = self._matrix[:len(self._values)] @ (query / norm)
+            best = int(scores.argmax())
+            return self._values[best] if scores[best] >= self.threshold else None
+
+    def _store_vector(self, slot: int, vector: list[float]) -> None:
+        if np is None:
+            if slot == len(self._vectors):
+                self._vectors.append(vector)
+            else:
+                self._vectors[slot] = vector
+            return
+        row = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(row)
+        if norm:
+            row = row / norm
+        if self._matrix is None:
+            self._matrix = np.empty((min(16, self.max_entries), row.size), dtype=np.float32)
+        elif slot >= len(self._matrix):
+            # Double on grow (capped at max_entries) so appends stay amortized O(d)
+            grown = np.empty((min(2 * len(self._matrix), self.max_entries), row.size), dtype=np.float32)
+            grown[:len(self._matrix)] = self._matrix
+            self._matrix = grown
+        self._matrix[slot] = row
+
+    def _store(self, text: str, vector: list[float] | None, value) -> None:
+        with self._lock:
+            if len(self._exact) >= self.max_entries:
+                self._exact.pop(next(iter(self._exact)))
+            self._exact[text] = value
+            if vector is not None:
+                if len(self._values) < self.max_entries:
+                    self._store_vector(len(self._values), vector)
+                    self._values.append(value)
+                else:
+                    self._store_vector(self._next, vector)
+                    self._values[self._next] = value
+                    self._next = (self._next + 1) % self.max_entries
+
+    def lookup(self, text: str):
+        """Return (hit, value, vector); vector is reused by `store` on a miss."""
+        if text in self._exact:
+            return True, self._exact[text], None
+        if self.embeddings is None:
+            return False, None, None
+        vector = self.embeddings.embed_query(text)
+        value = self._nearest(vector)
+        return value is not None, value, vector
+
+    async def alookup(self, text: str):
+        if text in self._exact:
+            return True, self._exact[text], None
+        if self.embeddings is None:
+            return False, None, None
+        vector = await self.embeddings.aembed_query(text)
+        value = self._nearest(vector)
+        return value is not None, value, vector
+
+    def store(self, text: str, value, vector: list[float] | None = None) -> None:
+        self._store(text, vector, value)
+
+
+class CachedLLM:
+    """Wrap a model or agent so repeated (or near-identical) prompts skip the call.
+
+    Exposes invoke/ainvoke/astream/abatch/with_structured_output; everything else is forwarded
+    to the wrapped runnable.
+    """
+
+    def __init__(self, inner, threshold: float = 0.95, cache: SemanticCache | None = None):
+        self._inner = inner
+        self.cache = cache or SemanticCache(threshold=threshold)
+        self._structured: dict[tuple, "CachedLLM"] = {}
+
+    def __getattr__(self, name):
+        if name == "_inner":
+            raise AttributeError(name)
+        return getattr(self._inner, name)
+
+    def with_structured_output(self, schema, threshold: float | None = None, **kwargs) -> "CachedLLM":
+        # One wrapper (and cache) per schema, so callers binding per request still share hits;
+        # kept apart from the plain cache so structured results never reach invoke callers
+        key = (schema, threshold, repr(sorted(kwargs.items())))
+        if key not in self._structured:
+            self._structured[key] = CachedLLM(
+                self._inner.with_structured_output(schema, **kwargs),
+                threshold=self.cache.threshold if threshold is None else threshold,
+            )
+        return self._structured[key]
+
+    def invoke(self, input, config=None, **kwargs):
+        text = prompt_text(input)
+        hit, value, vector = self.cache.lookup(text)
+        if hit:
+            return value
+        value = self._inner.invoke(input, config, **kwargs)
+        self.cache.store(text, value, vector)
+        return value
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        text = prompt_text(input)
+        hit, value, vector = await self.cache.alookup(text)
+        if hit:
+            return value
+        value = await self._inner.ainvoke(input, config, **kwargs)
+        self.cache.store(text, value, vector)
+        return value
+
+    async def astream(self, input, config=None, **kwargs):
+        """Stream from the wrapped model and cache the joined result; a hit is yielded as one chunk."""
+        text = prompt_text(input)
+        hit, value, vector = await self.cache.alookup(text)
+        if hit:
+            yield value
+            return
+        final = None
+        async for chunk in self._inner.astream(input, config, **kwargs):
+            final = chunk if final is None else final + chunk
+            yield chunk
+        if final is not None:
+            self.cache.store(text, final, vector)
+
+    async def abatch(self, inputs: list, config=None, **kwargs) -> list:
+        """Serve cached inputs directly and send only the misses as one abatch call."""
+        texts = [prompt_text(i) for i in inputs]
+        lookups = [await self.cache.alookup(t) for t in texts]
+        results = [value if hit else None for hit, value, _ in lookups]
+        misses = [i for i, (hit, _, _) in enumerate(lookups) if not hit]
+        if misses:
+            fresh = await self._inner.abatch([inputs[i] for i in misses], config, **kwargs)
+            for i, value in zip(misses, fresh):
+                self.cache.store(texts[i], value, lookups[i][2])
+                results[i] = value
+        return results
+
+
+class TurnCache:
+    """Semantic cache of whole agent turns: latest user message -> final AI message.
+
+    Entries live in scopes chosen by the caller (thread id plus whatever else
+    the answer depends on, e.g. the current workflow step). A turn that called
+    a tool in `mutating_tools` (any tool when None) or was interrupted is never
+    stored, since replaying it would skip the side effects.
+
+    Inputs shorter than `min_words` ("yes", "the other one") only make sense
+    against the previous reply, so they are never looked up or stored; callers
+    should also put the previous AI reply in the scope.
+    """
+
+    def __init__(self, threshold: float = 0.92, mutating_tools: set[str] | None = None, embeddings=None, min_words: int = 4):
+        self.threshold = threshold
+        self.mutating_tools = mutating_tools
+        self.min_words = min_words
+        self.embeddings = embeddings if embeddings is not None else get_embeddings()
+        self._scopes: dict[tuple, SemanticCache] = {}
+
+    def _cache(self, scope: tuple) -> SemanticCache:
+        if scope not in self._scopes:
+            self._scopes[scope] = SemanticCache(self.threshold, embeddings=self.embeddings)
+        return self._scopes[scope]
+
+    async def alookup(self, scope: tuple, user_text: str):
+        """Return (hit, message, vector); pass vector back to `store` on a miss."""
+        if len(user_text.split()) < self.min_words:
+            return False, None, None
+        return await self._cache(scope).alookup(prompt_text(user_text))
+
+    def store(self, scope: tuple, user_text: str, result: dict, vector=None) -> None:
+        if "__interrupt__" in result or len(user_text.split()) < self.min_words:
+            return
+        turn = []
+        for message in reversed(result["messages"]):
+            if message.type == "human":
+                break
+            turn.append(message)
+        for message in turn:
+            for call in getattr(message, "tool_calls", None) or []:
+                if self.mutating_tools is None or call["name"] in self.mutating_tools:
+                    return
+        if turn and turn[0].type == "ai":
+            self._cache(scope).store(prompt_text(user_text), turn[0], vector)
@@ -0,0 +1,19 @@
+"""Fast JSON encoding for tool results."""
+import json
+
+# orjson (pip install orjson) is several times faster than json.dumps; optional
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def to_json(obj, indent: bool = True) -> str:
+    """Serialize obj to a JSON string, using orjson when it is installed."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0).decode()
+        except TypeError:
+            # Types orjson refuses (e.g. non-str keys, big ints) take the stdlib path
+            pass
+    return json.dumps(obj, indent=2 if indent else None, ensure_ascii=False, default=str)
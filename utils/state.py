@@ -11,11 +11,17 @@ class Todo(TypedDict):
 def file_reducer(left, right):
     """Merge two file dictionaries, right side takes precedence."""
     if left is None:
+        return right or {}
+    if not right:
+        return left
+    # Nothing to keep from left; also covers the first files update of a thread
+    if not left:
         return right
-    elif right is None:
+    # Overlay changes nothing (e.g. a sub-agent echoing files it was given): share left as-is
+    if all(k in left and left[k] == v for k, v in right.items()):
         return left
-    else:
-        return {**left, **right}
+    # Single C-level merge; never mutate left, LangGraph may still hold it
+    return left | right
 
 class DeepAgentState(AgentState):
     """Extended agent state with TODO tracking and virtual file system."""
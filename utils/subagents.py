@@ -1,11 +1,20 @@
 """Utilities for creating and managing sub-agents."""
+import asyncio
+import hashlib
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
 from typing import Annotated, NotRequired, TypedDict
 from langchain.agents import create_agent
-from langchain_core.tools import tool, InjectedToolCallId, BaseTool
+from langchain_core.tools import tool, InjectedToolCallId, BaseTool, StructuredTool
 from langchain_core.messages import ToolMessage
 from langgraph.prebuilt import InjectedState
 from langgraph.types import Command
-from .console import console
+from .console import progress
+from .config import llm_config
+from .llm import cached_system_prompt, stable_tools
+from .summary_cache import SummaryCache, file_fingerprints
 
 class SubAgent(TypedDict):
     """Configuration for a specialized sub-agent."""
@@ -13,68 +22,259 @@ class SubAgent(TypedDict):
     description: str
     prompt: str
     tools: NotRequired[list[str]]
+    cache: NotRequired[bool]  # Reuse results for unchanged files (needs a SummaryCache)
+    files: NotRequired[bool]  # Hand the parent's virtual files to the sub-agent (default True)
 
-def create_task_tool(tools, subagents: list[SubAgent], model, state_schema):
-    """Create a task delegation tool for context isolation through sub-agents."""
+# id-tuple of a tools list -> (the list, kept alive so ids aren't reused; name -> tool, sorted)
+_RESOLVED_TOOLS: dict[tuple[int, ...], tuple[tuple, dict[str, BaseTool]]] = {}
+
+
+def _resolve_tools(tools) -> dict[str, BaseTool]:
+    """Wrap plain functions with `tool()` and index by name, once per tools list."""
+    key = tuple(map(id, tools))
+    hit = _RESOLVED_TOOLS.get(key)
+    if hit is None:
+        by_name = {}
+        for tool_ in tools:
+            if not isinstance(tool_, BaseTool):
+                tool_ = tool(tool_)
+            by_name[tool_.name] = tool_
+        hit = _RESOLVED_TOOLS[key] = (tuple(tools), {name: by_name[name] for name in sorted(by_name)})
+    return hit[1]
+
+
+def create_task_tool(tools, subagents: list[SubAgent], model, state_schema, cache: SummaryCache | None = None, response_ttl: float = 3600):
+    """Create a task delegation tool for context isolation through sub-agents.
+
+    With a deterministic model (temperature 0), a repeated delegation (same
+    agent, description, `files` state and referenced files on disk) within
+    `response_ttl` seconds returns the earlier answer without running the
+    sub-agent again. Agents with `cache` enabled use only the SummaryCache.
+    """
     
     agents = {}
-    tools_by_name = {}
-    
-    for tool_ in tools:
-        if not isinstance(tool_, BaseTool):
-            tool_ = tool(tool_)
-        tools_by_name[tool_.name] = tool_
+    # response key -> (stored at, content, files update); only for temperature 0 models
+    responses: dict[str, tuple[float, str, dict]] = {}
+    deterministic = response_ttl > 0 and getattr(model, "temperature", None) == 0
+    cacheable = {a["name"] for a in subagents if a.get("cache")} if cache else set()
+    shares_files = {a["name"] for a in subagents if a.get("files", True)}
+    tools_by_name = _resolve_tools(tools)
     
     for _agent in subagents:
         if "tools" in _agent:
             _tools = [tools_by_name[t] for t in _agent["tools"] if t in tools_by_name]
         else:
-            _tools = tools
+            _tools = list(tools_by_name.values())
+        # Static prompt + name-sorted tool schemas: every task call sends the same cacheable prefix
         agents[_agent["name"]] = create_agent(
             model, 
-            system_prompt=_agent["prompt"], 
-            tools=_tools, 
+            system_prompt=cached_system_prompt(_agent["prompt"]), 
+            tools=stable_tools(_tools), 
             state_schema=state_schema
         )
     
+    # Read-only from here on; the error hint is built once, not per bad call
+    agents = MappingProxyType(agents)
+    available = f"Available: {list(agents)}"
     other_agents_string = [f"- {a['name']}: {a['description']}" for a in subagents]
+    # Caps concurrent delegations when the model emits several task calls in one step
+    semaphore = asyncio.Semaphore(max(1, llm_config.subagent_concurrency))
     
-    @tool(description=f"Delegate a task to a specialized sub-agent. Available agents:\n" + "\n".join(other_agents_string))
-    def task(
-        description: str,
-        subagent_type: str,
-        state: Annotated[state_schema, InjectedState],
-        tool_call_id: Annotated[str, InjectedToolCallId],
-    ):
-        """Delegate a task to a sub-agent with isolated context.
-        
-        Args:
-            description: Clear description of the task to perform.
-            subagent_type: Name of the sub-agent to use.
-        """
+    def response_key(description: str, subagent_type: str, state) -> str:
+        files = state.get("files") or {}
+        files_digest = hash(frozenset(files.items()))
+        # (path, mtime, size) of files named in the task: editing one invalidates the answer
+        prints = file_fingerprints(description)
+        return hashlib.sha256(f"{subagent_type}\0{description}\0{files_digest}\0{prints}".encode()).hexdigest()
+    
+    def start(description: str, subagent_type: str, state, tool_call_id: str):
+        """Return (early result, (cache key, response key), isolated state) for a delegation."""
         if subagent_type not in agents:
-            return f"Error: Unknown agent type '{subagent_type}'. Available: {list(agents.keys())}"
+            return f"Error: Unknown agent type '{subagent_type}'. {available}", None, None
         
-        console.print(f"🤖 Delegating to [cyan]{subagent_type}[/cyan]: {description[:50]}...", style="info")
+        progress(f"🤖 Delegating to [cyan]{subagent_type}[/cyan]: {description[:50]}...")
         
-        sub_agent = agents[subagent_type]
+        # Same task on unchanged files (same path, mtime and size): reuse the earlier answer
+        cache_key = cache.make_key(subagent_type, description) if subagent_type in cacheable else None
+        if cache_key:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                progress(f"♻️  Reusing cached result from [cyan]{subagent_type}[/cyan]")
+                return Command(update={"messages": [ToolMessage(cached, tool_call_id=tool_call_id)]}), None, None
         
-        # Create isolated context
-        isolated_state = dict(state)
-        isolated_state["messages"] = [{"role": "user", "content": description}]
+        # Same delegation earlier this session, with the same virtual files: reuse the answer
+        # (agents backed by the SummaryCache skip this: it is the one that tracks disk changes)
+        resp_key = response_key(description, subagent_type, state) if deterministic and subagent_type not in cacheable else None
+        if resp_key:
+            hit = responses.get(resp_key)
+            if hit is not None and time.monotonic() - hit[0] < response_ttl:
+                progress(f"♻️  Reusing earlier result from [cyan]{subagent_type}[/cyan]")
+                return Command(update={
+                    "files": hit[2],
+                    "messages": [ToolMessage(hit[1], tool_call_id=tool_call_id)],
+                }), None, None
         
-        result = sub_agent.invoke(isolated_state)
+        # Create isolated context: the task plus, if the agent uses them, the virtual files
+        isolated_state = {"messages": [{"role": "user", "content": description}]}
+        if subagent_type in shares_files:
+            isolated_state["files"] = state.get("files") or {}
+        return None, (cache_key, resp_key), isolated_state
+    
+    def finish(result, keys: tuple[str | None, str | None], tool_call_id: str) -> Command:
+        cache_key, resp_key = keys
+        content = result["messages"][-1].content
+        files = result.get("files", {})
+        if cache_key and isinstance(content, str):
+            cache.put(cache_key, content)
+        if resp_key and isinstance(content, str):
+            if len(responses) >= 256:
+                responses.pop(next(iter(responses)))
+            responses[resp_key] = (time.monotonic(), content, files)
         
         return Command(
             update={
-                "files": result.get("files", {}),
+                "files": files,
                 "messages": [
                     ToolMessage(
-                        result["messages"][-1].content, 
+                        content, 
                         tool_call_id=tool_call_id
                     )
                 ],
             }
         )
     
-    return task
+    def run_task(
+        description: str,
+        subagent_type: str,
+        state: Annotated[state_schema, InjectedState],
+        tool_call_id: Annotated[str, InjectedToolCallId],
+    ):
+        """Delegate a task to a sub-agent with isolated context.
+        
+        Args:
+            description: Clear description of the task to perform.
+            subagent_type: Name of the sub-agent to use.
+        """
+        early, keys, isolated_state = start(description, subagent_type, state, tool_call_id)
+        if early is not None:
+            return early
+        return finish(agents[subagent_type].invoke(isolated_state), keys, tool_call_id)
+    
+    async def arun_task(
+        description: str,
+        subagent_type: str,
+        state: Annotated[state_schema, InjectedState],
+        tool_call_id: Annotated[str, InjectedToolCallId],
+    ):
+        # Async agents run several task calls from one model step concurrently
+        early, keys, isolated_state = start(description, subagent_type, state, tool_call_id)
+        if early is not None:
+            return early
+        async with semaphore:
+            result = await agents[subagent_type].ainvoke(isolated_state)
+        return finish(result, keys, tool_call_id)
+    
+    return StructuredTool.from_function(
+        func=run_task,
+        coroutine=arun_task,
+        name="task",
+        description="Delegate a task to a specialized sub-agent. Available agents:\n" + "\n".join(other_agents_string),
+    )
+
+
+def _parse_batch(content, count: int) -> list[str] | None:
+    """Summaries from a batched reply (a JSON array, possibly in a code fence), or None."""
+    if not isinstance(content, str):
+        return None
+    start, end = content.find("["), content.rfind("]")
+    if start < 0 or end < start:
+        return None
+    try:
+        items = json.loads(content[start:end + 1])
+    except ValueError:
+        return None
+    if not isinstance(items, list) or len(items) != count:
+        return None
+    summaries = [item.get("summary") if isinstance(item, dict) else None for item in items]
+    return summaries if all(isinstance(summary, str) for summary in summaries) else None
+
+
+def create_per_file_tool(tools, subagent: SubAgent, model, state_schema, cache: SummaryCache | None = None, max_workers: int = 4, batch_size: int | None = None):
+    """Create a tool that runs one sub-agent per file, each with only that file in context.
+
+    Small single-file prompts look the same whatever other files are asked for,
+    so prompt caches and the SummaryCache hit far more often than with one
+    large multi-file context.
+
+    With `batch_size` > 1 (default SUBAGENT_BATCH_SIZE), uncached files are sent
+    up to that many per sub-agent call instead, trading those cache hits for
+    fewer requests when a rate limit is the bottleneck.
+    """
+    batch_size = max(1, batch_size if batch_size is not None else llm_config.subagent_batch_size)
+    tools_by_name = _resolve_tools(tools)
+    _tools = [tools_by_name[t] for t in subagent["tools"] if t in tools_by_name] if "tools" in subagent else list(tools_by_name.values())
+    agent = create_agent(
+        model,
+        system_prompt=cached_system_prompt(subagent["prompt"]),
+        tools=stable_tools(_tools),
+        state_schema=state_schema,
+    )
+    
+    def cache_key(file_path: str) -> str | None:
+        return cache.make_key(subagent["name"], f"Summarize the file at {file_path}") if cache else None
+    
+    def remember(file_path: str, content) -> None:
+        key = cache_key(file_path)
+        if key and isinstance(content, str):
+            cache.put(key, content)
+    
+    def run_one(file_path: str) -> str:
+        description = f"Summarize the file at {file_path}"
+        result = agent.invoke({"messages": [{"role": "user", "content": description}]})
+        content = result["messages"][-1].content
+        remember(file_path, content)
+        return content
+    
+    def run_batch(file_paths: list[str]) -> list[str]:
+        if len(file_paths) == 1:
+            return [run_one(file_paths[0])]
+        listing = "\n".join(f"{i}. {path}" for i, path in enumerate(file_paths, 1))
+        description = (
+            f"Summarize each of the following {len(file_paths)} files separately:\n{listing}\n\n"
+            'Reply with only a JSON array, one object per file in the same order: [{"path": "...", "summary": "..."}]'
+        )
+        result = agent.invoke({"messages": [{"role": "user", "content": description}]})
+        summaries = _parse_batch(result["messages"][-1].content, len(file_paths))
+        if summaries is None:
+            # Malformed reply: fall back to one call per file
+            return [run_one(path) for path in file_paths]
+        for path, summary in zip(file_paths, summaries):
+            remember(path, summary)
+        return summaries
+    
+    @tool(description=(
+        f"Run {subagent['name']} on several files at once. Each file is handled separately "
+        "and in parallel; returns one section per file."
+    ))
+    def summarize_files(file_paths: list[str]) -> str:
+        """Summarize each file independently.
+        
+        Args:
+            file_paths: Full paths of the files to summarize.
+        """
+        progress(f"🤖 Summarizing [cyan]{len(file_paths)}[/cyan] file(s) with {subagent['name']}")
+        # Unchanged files (same path, mtime and size) come from the cache
+        summaries = {}
+        for path in file_paths:
+            key = cache_key(path)
+            cached = cache.get(key) if key else None
+            if cached is not None:
+                summaries[path] = cached
+        pending = [path for path in dict.fromkeys(file_paths) if path not in summaries]
+        groups = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for group, results in zip(groups, pool.map(run_batch, groups)):
+                summaries.update(zip(group, results))
+        return "\n\n".join(f"### {path}\n{summaries[path]}" for path in file_paths)
+    
+    return summarize_files
@@ -0,0 +1,73 @@
+"""Content-addressed cache for sub-agent results that depend on files on disk."""
+import hashlib
+import os
+import re
+import sqlite3
+import stat
+import threading
+from collections import OrderedDict
+
+# Path-like tokens in a task description ("~/docs/a.md", "C:\notes\b.txt", "./x.py")
+_PATH_RE = re.compile(r"[\w~./\\:-]+\.\w+")
+
+
+def file_fingerprints(text: str) -> list[tuple[str, int, int]]:
+    """Return (path, mtime_ns, size) for every existing file mentioned in text."""
+    prints = set()
+    for token in _PATH_RE.findall(text):
+        path = os.path.abspath(os.path.expanduser(token.rstrip(".,:;")))
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        if stat.S_ISREG(st.st_mode):
+            prints.add((path, st.st_mtime_ns, st.st_size))
+    return sorted(prints)
+
+
+class SummaryCache:
+    """LRU in memory, backed by a SQLite file (WAL mode) so hits survive restarts.
+
+    Keys include the (path, mtime_ns, size) of each referenced file, so editing
+    a file naturally invalidates its entries.
+    """
+
+    def __init__(self, db_path: str = "~/.deep_agent_cache.sqlite3", max_memory: int = 256):
+        self.max_memory = max_memory
+        self._memory: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.expanduser(db_path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS summaries (key TEXT PRIMARY KEY, summary TEXT NOT NULL)")
+        self._db.commit()
+
+    @staticmethod
+    def make_key(agent_name: str, description: str) -> str | None:
+        """Cache key for a task, or None when it references no files (nothing to validate against)."""
+        prints = file_fingerprints(description)
+        if not prints:
+            return None
+        return hashlib.sha256(repr((agent_name, description, prints)).encode()).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+            row = self._db.execute("SELECT summary FROM summaries WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._remember(key, row[0])
+                return row[0]
+        return None
+
+    def put(self, key: str, summary: str) -> None:
+        with self._lock:
+            self._remember(key, summary)
+            self._db.execute("INSERT OR REPLACE INTO summaries (key, summary) VALUES (?, ?)", (key, summary))
+            self._db.commit()
+
+    def _remember(self, key: str, summary: str) -> None:
+        self._memory[key] = summary
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.max_memory:
+            self._memory.popitem(last=False)
@@ -1,9 +1,242 @@
+import asyncio
+import fnmatch
+import functools
+import mmap
 import os
 import pathlib
-from langchain_core.tools import tool
+import stat
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from langchain_core.tools import StructuredTool, tool
 from ..console import console
 import re
 
+# Prefer RE2's linear-time DFA engine (pip install google-re2) for bulk file scans when available
+try:
+    import re2 as _regex_engine
+except ImportError:
+    _regex_engine = re
+
+
+def _scan_dir(path: str, show_hidden: bool = True):
+    """Return the (files, subdirectories) DirEntry lists of a single directory.
+
+    show_hidden=False drops dot-files only: hidden directories (e.g. `.github`)
+    are still returned, so a recursive walk lists their files like rglob did.
+    """
+    files, dirs = [], []
+    with os.scandir(path) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                dirs.append(entry)
+            elif (show_hidden or not entry.name.startswith('.')) and entry.is_file():
+                files.append(entry)
+    return files, dirs
+
+
+def _scan_subdir(path: str, show_hidden: bool = True):
+    """Like _scan_dir, but treat an unreadable subdirectory as empty."""
+    try:
+        return _scan_dir(path, show_hidden)
+    except PermissionError:
+        return [], []
+
+
+def _walk_files(root: str, recursive: bool = False, show_hidden: bool = True, max_workers: int = 1):
+    """Yield os.DirEntry objects for files under root.
+
+    Uses os.scandir so file type checks come from the directory listing itself
+    instead of extra stat calls per entry. Unreadable subdirectories are skipped.
+    With max_workers > 1, directories are scanned concurrently on a thread pool,
+    which overlaps the blocking directory reads on slow or network disks.
+    """
+    files, dirs = _scan_dir(root, show_hidden)
+    yield from files
+    if not recursive:
+        return
+    
+    if max_workers <= 1:
+        stack = [d.path for d in dirs]
+        while stack:
+            files, dirs = _scan_subdir(stack.pop(), show_hidden)
+            yield from files
+            stack.extend(d.path for d in dirs)
+        return
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending = {pool.submit(_scan_subdir, d.path, show_hidden) for d in dirs}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                files, dirs = future.result()
+                yield from files
+                pending.update(pool.submit(_scan_subdir, d.path, show_hidden) for d in dirs)
+
+
+def _walk_tree(root: str, exclude: set[str], max_depth: int):
+    """Yield os.DirEntry objects for non-hidden files under root, depth first.
+
+    Excluded directories are pruned before descending, so `.git` or
+    `node_modules` are never listed at all, and nothing deeper than
+    `max_depth` directories below root is opened. Unreadable directories
+    are skipped.
+    """
+    # Split once: exact names are a set lookup, only real globs (e.g. *.egg-info) run a regex
+    exclude_names = frozenset(p for p in exclude if '*' not in p)
+    exclude_globs = tuple(_glob_re(p) for p in exclude if '*' in p)
+    
+    def excluded(name: str) -> bool:
+        return name in exclude_names or any(g.match(name) for g in exclude_globs)
+    
+    stack = [(root, 0)]
+    while stack:
+        path, depth = stack.pop()
+        try:
+            with os.scandir(path) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        subdirs = []
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if depth < max_depth and not excluded(entry.name):
+                    subdirs.append((entry.path, depth + 1))
+            elif not entry.name.startswith('.') and entry.is_file():
+                yield entry
+        # Reversed so directories are visited in listing order
+        stack.extend(reversed(subdirs))
+
+
+@functools.lru_cache(maxsize=256)
+def _glob_re(pattern: str) -> re.Pattern:
+    """Compile a filename glob to a regex once; repeated searches reuse it."""
+    # Match the platform's filename case rules, like fnmatch.fnmatch does
+    flags = re.IGNORECASE if os.name == 'nt' else 0
+    return re.compile(fnmatch.translate(pattern), flags)
+
+
+# Directory-scanning threads used by find_files
+FIND_FILES_WORKERS = 8
+# Files scanned in parallel by search_text_patterns
+SEARCH_WORKERS = 8
+
+# Writes larger than this are encoded and written in chunks
+_STREAM_WRITE_THRESHOLD = 1 << 20
+_WRITE_CHUNK_CHARS = 1 << 16
+
+
+def _write_text(path, content: str, append: bool = False) -> None:
+    """Write content as UTF-8, like open(path, 'a' or 'w').write(content).
+
+    Large content is encoded 64K characters at a time straight to the file
+    descriptor, so the whole encoded copy never exists in memory at once.
+    """
+    if len(content) <= _STREAM_WRITE_THRESHOLD:
+        with open(path, 'a' if append else 'w', encoding='utf-8') as f:
+            f.write(content)
+        return
+    
+    flags = os.O_WRONLY | os.O_CREAT | (os.O_APPEND if append else os.O_TRUNC) | getattr(os, 'O_BINARY', 0)
+    fd = os.open(path, flags, 0o644)
+    try:
+        for i in range(0, len(content), _WRITE_CHUNK_CHARS):
+            chunk = content[i:i + _WRITE_CHUNK_CHARS]
+            if os.linesep != '\n':
+                # Same newline translation as text mode (Windows)
+                chunk = chunk.replace('\n', os.linesep)
+            view = memoryview(chunk.encode('utf-8'))
+            while view:
+                view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+
+# Constructs the byte scan can't reproduce: classes whose meaning differs between str
+# (Unicode) and bytes (ASCII), line breaks and hex/octal escapes that may spell one,
+# whole-input anchors (text mode searches line by line) and inline flags turning `m` off
+_LINE_SCAN_ONLY_RE = re.compile(r"\\[wWbBsSdDAZzGnrxuUN0]|[\r\n]|\(\?[a-zA-Z]*-")
+# Files at least this big are memory-mapped instead of read
+_MMAP_THRESHOLD = 1 << 16
+
+
+def _bytes_pattern(pattern: str, flags: int):
+    """Bytes twin of a search pattern, or None when bytes matching could differ.
+
+    Compiled with RE2 when installed (linear time whatever the pattern), else
+    `re`. Flags are inline so both engines read them the same way; patterns
+    RE2 can't express (backreferences, lookarounds) fall back to `re`.
+    """
+    if not pattern.isascii() or _LINE_SCAN_ONLY_RE.search(pattern):
+        return None
+    source = ("(?mi)" if flags & re.IGNORECASE else "(?m)") + pattern
+    for engine in dict.fromkeys((_regex_engine, re)):
+        try:
+            return engine.compile(source.encode())
+        except Exception:
+            continue
+    return None
+
+
+def _search_lines(path: str, text_re: re.Pattern, limit: int) -> list[tuple[int, str]]:
+    """(line number, line) for up to limit matching lines, decoding every line."""
+    hits = []
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        for line_num, line in enumerate(f, 1):
+            if text_re.search(line):
+                hits.append((line_num, line.rstrip()))
+                if len(hits) >= limit:
+                    break
+    return hits
+
+
+def _search_buffer(buf, text_re: re.Pattern, bytes_re: re.Pattern, limit: int) -> list[tuple[int, str]]:
+    """Like _search_lines over raw bytes: jump from match to match, decode only those lines.
+
+    Line numbers are counted with bytes.count between hits, and
+    each candidate line is confirmed with the original pattern, so results are
+    the same as the line-by-line scan. Only \n ends a line here: buffers with
+    \r line breaks go through _search_lines instead (see _search_file).
+    """
+    hits = []
+    pos = line_num = counted_to = 0
+    while len(hits) < limit:
+        m = bytes_re.search(buf, pos)
+        if m is None:
+            break
+        start = buf.rfind(b'\n', 0, m.start()) + 1
+        end = buf.find(b'\n', m.start())
+        end = len(buf) if end < 0 else end
+        # mmap has no count(); a slice is bytes, counted at memchr speed
+        line_num += buf[counted_to:start].count(b'\n')
+        counted_to = start
+        # With its \n, like the lines text mode yields (`[^x]` can match it there too)
+        line = buf[start:end + 1].decode('utf-8', errors='ignore')
+        if text_re.search(line):
+            hits.append((line_num + 1, line.rstrip()))
+        pos = end + 1
+    return hits
+
+
+def _search_file(path: str, text_re: re.Pattern, bytes_re: re.Pattern | None, limit: int) -> list[tuple[int, str]]:
+    """Matching (line number, line) pairs of one file, at most limit of them."""
+    if bytes_re is None:
+        return _search_lines(path, text_re, limit)
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        # RE2 wants real bytes; `re` can search the mapping directly
+        if size < _MMAP_THRESHOLD or not isinstance(bytes_re, re.Pattern):
+            buf = f.read()
+            if b'\r' not in buf:
+                return _search_buffer(buf, text_re, bytes_re, limit)
+        else:
+            # Mapped, not read: files without matches are scanned straight from the page cache
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if mm.find(b'\r') < 0:
+                    return _search_buffer(mm, text_re, bytes_re, limit)
+    # Text mode splits on \r\n and lone \r too (and strips them before `$`)
+    return _search_lines(path, text_re, limit)
+
+
 @tool(
     "list_files_in_dir",
     parse_docstring=True,
@@ -40,33 +273,25 @@ def list_files_in_dir(
         return f"Error: Path is not a directory: {path}"
     
     try:
+        exts = tuple(ext.lower() for ext in extensions) if extensions else None
         items = []
-        iterator = path.rglob("*") if recursive else path.iterdir()
         
-        for item in sorted(iterator):
-            # Skip hidden files if not requested
-            if not show_hidden and item.name.startswith('.'):
-                continue
-            
-            # Skip directories when listing files
-            if item.is_dir():
-                continue
-            
+        for entry in _walk_files(str(path), recursive, show_hidden):
             # Filter by extension if specified
-            if extensions:
-                if item.suffix.lower() not in [ext.lower() for ext in extensions]:
-                    continue
+            if exts and not entry.name.lower().endswith(exts):
+                continue
             
-            items.append(str(item))
+            items.append(entry.path)
+        
+        items.sort()
         
         if not items:
             return f"No files found in {path}" + (f" with extensions {extensions}" if extensions else "")
         
-        result = f"Found {len(items)} file(s) in {path}:\n\n"
-        for item in items:
-            result += f"  📄 {item}\n"
+        lines = [f"Found {len(items)} file(s) in {path}:", ""]
+        lines.extend(f"  📄 {item}" for item in items)
         
-        return result
+        return "\n".join(lines)
     
     except PermissionError:
         return f"Error: Permission denied accessing {path}"
@@ -74,15 +299,7 @@ def list_files_in_dir(
         return f"Error listing directory: {str(e)}"
 
 
-@tool(
-    "read_file_content",
-    parse_docstring=True,
-    description=(
-        "Read the contents of a text file from disk. "
-        "Automatically detects encoding and handles large files."
-    ),
-)
-def read_file_content(
+def _read_file_content(
     file_path: str,
     max_chars: int = 5000
 ) -> str:
@@ -97,35 +314,70 @@ def read_file_content(
     """
     console.print(f"📄 Reading file: '[cyan]{file_path}[/cyan]'", style="info")
     
-    path = pathlib.Path(file_path).expanduser().resolve()
+    # Absolute paths are used as-is; otherwise one C-level abspath instead of pathlib.resolve()
+    path = os.path.expanduser(file_path)
+    if not os.path.isabs(path):
+        path = os.path.abspath(path)
     
-    if not path.exists():
+    # A single stat answers exists / is-file / size
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
         return f"Error: File does not exist: {path}"
+    except OSError as e:
+        return f"Error reading file: {str(e)}"
     
-    if not path.is_file():
+    if not stat.S_ISREG(st.st_mode):
         return f"Error: Path is not a file: {path}"
     
+    file_size = st.st_size
     try:
-        # Try UTF-8 first
-        with open(path, 'r', encoding='utf-8') as f:
-            content = f.read()
-    except UnicodeDecodeError:
-        try:
-            with open(path, 'r', encoding='latin-1') as f:
-                content = f.read()
-        except Exception as e:
-            return f"Error: Cannot read file encoding: {str(e)}"
+        # Unbuffered binary read of just enough bytes for max_chars (UTF-8 is at most
+        # 4 bytes per character), decoded once; huge files are never fully loaded
+        with open(path, 'rb', buffering=0) as f:
+            data = f.read(min(file_size, max_chars * 4 + 4))
     except Exception as e:
         return f"Error reading file: {str(e)}"
     
+    try:
+        # Try UTF-8 first
+        content = data.decode('utf-8')
+    except UnicodeDecodeError as e:
+        if e.reason == 'unexpected end of data' and len(data) < file_size:
+            # Only the last character was cut in half by the bounded read
+            content = data[:e.start].decode('utf-8')
+        else:
+            # Not UTF-8 (e.g. latin-1 / cp1252): every byte decodes as latin-1
+            content = data.decode('latin-1')
+    # Same result as text mode: \r\n and lone \r become \n
+    content = content.replace('\r\n', '\n').replace('\r', '\n')
+    
     if not content:
         return f"File is empty: {path}"
     
     # Truncate if too long
     if len(content) > max_chars:
-        content = content[:max_chars] + f"\n\n... [truncated, showing first {max_chars} of {len(content)} characters]"
+        content = content[:max_chars] + f"\n\n... [truncated, showing first {max_chars} characters of {file_size} bytes]"
     
-    return f"=== Content of {path.name} ===\n\n{content}"
+    return f"=== Content of {os.path.basename(path)} ===\n\n{content}"
+
+
+async def _aread_file_content(file_path: str, max_chars: int = 5000) -> str:
+    """Async read_file_content: the blocking file I/O runs in a worker thread."""
+    return await asyncio.to_thread(_read_file_content, file_path, max_chars)
+
+
+# Async agents (ainvoke/astream) use the coroutine, so reads overlap other tool calls
+read_file_content = StructuredTool.from_function(
+    func=_read_file_content,
+    coroutine=_aread_file_content,
+    name="read_file_content",
+    parse_docstring=True,
+    description=(
+        "Read the contents of a text file from disk. "
+        "Automatically detects encoding and handles large files."
+    ),
+)
 
 
 @tool(
@@ -159,9 +411,7 @@ def write_results_file(
         # Create parent directories if needed
         path.parent.mkdir(parents=True, exist_ok=True)
         
-        mode = 'a' if append else 'w'
-        with open(path, mode, encoding='utf-8') as f:
-            f.write(content)
+        _write_text(path, content, append)
         
         file_size = path.stat().st_size
         action = "appended to" if append else "written to"
@@ -208,16 +458,19 @@ def find_files(
         return f"Error: Path is not a directory: {search_path}"
     
     try:
-        if recursive:
-            matches = list(search_path.glob(f"**/{pattern}"))
+        if '/' in pattern or os.sep in pattern:
+            # Patterns spanning directories still need pathlib's glob semantics
+            matches = search_path.glob(f"**/{pattern}") if recursive else search_path.glob(pattern)
+            file_paths = sorted(str(m) for m in matches if m.is_file())
         else:
-            matches = list(search_path.glob(pattern))
+            name_re = _glob_re(pattern)
+            file_paths = sorted(
+                entry.path
+                for entry in _walk_files(str(search_path), recursive, max_workers=FIND_FILES_WORKERS)
+                if name_re.match(entry.name)
+            )
         
-        # Filter out directories
-        matches = [m for m in matches if m.is_file()]
-        
-        if matches:
-            file_paths = [str(m.resolve()) for m in matches]
+        if file_paths:
             return f"Found {len(file_paths)} file(s):\n" + "\n".join(f"  📄 {p}" for p in file_paths)
         else:
             return f"No files found matching '{pattern}' in {search_path}"
@@ -395,9 +648,7 @@ def write_file(
         path.parent.mkdir(parents=True, exist_ok=True)
         
         # Write or append to file
-        mode = 'a' if append else 'w'
-        with open(path, mode, encoding='utf-8') as f:
-            f.write(content)
+        _write_text(path, content, append)
         
         # Get file size in bytes
         file_size = path.stat().st_size
@@ -582,6 +833,8 @@ def search_text_patterns(
         # Compile regex pattern with case sensitivity option
         flags = 0 if case_sensitive else re.IGNORECASE
         compiled_pattern = re.compile(pattern, flags)
+        # ASCII patterns scan raw bytes; others decode line by line
+        bytes_pattern = _bytes_pattern(pattern, flags)
     except re.error as e:
         raise ValueError(f"Invalid regex pattern: {e}")
     
@@ -596,79 +849,66 @@ def search_text_patterns(
     max_files_reached = False
     max_results_reached = False
     
-    def should_exclude(file_path: pathlib.Path) -> bool:
-        """Check if any part of the path is in the exclude set."""
-        for part in file_path.parts:
-            if part in exclude_set:
-                return True
-            # Also check for glob patterns like *.egg-info
-            for excl_pattern in exclude_set:
-                if '*' in excl_pattern and pathlib.PurePath(part).match(excl_pattern):
-                    return True
-        return False
-    
-    def get_depth(file_path: pathlib.Path, base_path: pathlib.Path) -> int:
-        """Calculate directory depth relative to base path."""
-        try:
-            rel_path = file_path.relative_to(base_path)
-            return len(rel_path.parts) - 1  # -1 because we don't count the file itself
-        except ValueError:
-            return 0
-    
     # Determine if we're searching a directory or file
     if search_path.is_file():
         # Search single file
         try:
-            with open(search_path, 'r', encoding='utf-8', errors='ignore') as f:
-                for line_num, line in enumerate(f, 1):
-                    if compiled_pattern.search(line):
-                        results.append(f"{search_path}:{line_num}: {line.rstrip()}")
-                        if len(results) >= max_results:
-                            max_results_reached = True
-                            break
+            hits = _search_file(str(search_path), compiled_pattern, bytes_pattern, max_results)
+            results.extend(f"{search_path}:{line_num}: {line}" for line_num, line in hits)
+            max_results_reached = len(results) >= max_results
         except Exception as e:
             raise ValueError(f"Error reading file {search_path}: {e}")
     
     elif search_path.is_dir():
-        # Search directory recursively
-        # Build glob pattern based on file_extension
-        glob_pattern = f"**/*{file_extension}" if file_extension != "*" else "**/*"
+        # Search directory recursively; excluded and too-deep directories are never entered
+        suffix = file_extension if file_extension != "*" else ""
         
-        for file_path in search_path.glob(glob_pattern):
-            # Check if we've hit limits
-            if max_results_reached or max_files_reached:
-                break
-            
-            # Skip directories and hidden files
-            if file_path.is_dir() or file_path.name.startswith('.'):
-                continue
-            
-            # Skip excluded directories
-            if should_exclude(file_path):
-                continue
-            
-            # Check depth limit
-            depth = get_depth(file_path, search_path)
-            if depth > max_depth:
-                continue
-            
-            # Check files limit
+        # Files are scanned on a thread pool a few ahead of the walk; results are
+        # consumed in walk order, so output and limits match a serial scan
+        pending = deque()
+        queued = 0
+        
+        def collect() -> None:
+            nonlocal files_searched, results, max_results_reached
+            file_path, future = pending.popleft()
             files_searched += 1
-            if files_searched > max_files:
-                max_files_reached = True
-                break
-            
             try:
-                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    for line_num, line in enumerate(f, 1):
-                        if compiled_pattern.search(line):
-                            results.append(f"{file_path}:{line_num}: {line.rstrip()}")
-                            if len(results) >= max_results:
-                                max_results_reached = True
-                                break
+                hits = future.result()
             except Exception:
                 # Skip files that can't be read
-                continue
+                return
+            results.extend(f"{file_path}:{line_num}: {line}" for line_num, line in hits)
+            if len(results) >= max_results:
+                results = results[:max_results]
+                max_results_reached = True
+        
+        pool = ThreadPoolExecutor(max_workers=SEARCH_WORKERS)
+        try:
+            for entry in _walk_tree(str(search_path), exclude_set, max_depth):
+                # Check if we've hit limits
+                if max_results_reached:
+                    break
+                
+                if not entry.name.endswith(suffix):
+                    continue
+                
+                # Check files limit
+                queued += 1
+                if queued > max_files:
+                    max_files_reached = True
+                    break
+                
+                pending.append((entry.path, pool.submit(
+                    _search_file, entry.path, compiled_pattern, bytes_pattern, max_results
+                )))
+                if len(pending) >= 2 * SEARCH_WORKERS:
+                    collect()
+            
+            while pending and not max_results_reached:
+                collect()
+        finally:
+            # Files queued past the max_results cut are dropped, not scanned
+            pool.shutdown(wait=True, cancel_futures=True)
     
     # Format output
     if not results:
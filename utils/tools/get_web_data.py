@@ -1,10 +1,11 @@
 import trafilatura
-import json
 import time
 import random
 from typing import Dict, Any, Optional
 from langchain.tools import tool
 
+from ..serialization import to_json
+
 from langchain.tools import tool, ToolRuntime
 from typing import List, Dict, Any
 
@@ -99,7 +100,7 @@ def get_web_data(url: str, output_format: str = "markdown") -> str:
     """
     print(f"Retrieving data from: {url}...")
     data = retrieve(url, output_format=output_format)
-    return json.dumps(data, indent=2)
+    return to_json(data)
 
 if __name__ == "__main__":
     # Quick test
@@ -2,10 +2,11 @@ import requests
 from bs4 import BeautifulSoup
 import time
 import random
-import json
 from typing import List, Dict, Any
 from langchain.tools import tool
 
+from ..serialization import to_json
+
 from langchain.tools import tool, ToolRuntime
 from typing import List, Dict, Any
 
@@ -175,7 +176,7 @@ def get_web_links(query: str, max_results: int = 5) -> str:
     if not results:
         results = search_google(query, max_results)
         
-    return json.dumps(results, indent=2)
+    return to_json(results)
 
 if __name__ == "__main__":
     # Quick test    
@@ -1,4 +1,5 @@
 """Planning tools for task breakdown and thinking."""
+from datetime import datetime
 from typing import Annotated
 from langchain_core.tools import tool, InjectedToolCallId
 from langchain_core.messages import ToolMessage
@@ -79,13 +80,13 @@ def read_todos(
     if not todos:
         return "No TODOs currently set."
     
-    result = "Current TODO list:\n"
+    lines = ["Current TODO list:"]
     for i, todo in enumerate(todos, 1):
         status = todo.get("status", "pending")
         status_icon = {"pending": "⏳", "in_progress": "🔄", "completed": "✅"}.get(status, "❓")
-        result += f"  {i}. {status_icon} [{status}] {todo.get('content', 'Unnamed')}\n"
+        lines.append(f"  {i}. {status_icon} [{status}] {todo.get('content', 'Unnamed')}")
     
-    return result
+    return "\n".join(lines)
 
 
 @tool(
@@ -107,3 +108,21 @@ def think(reflection: str) -> str:
     """
     console.print(f"💭 [dim]{reflection[:100]}...[/dim]" if len(reflection) > 100 else f"💭 [dim]{reflection}[/dim]")
     return f"Reflection noted. Continue with your plan."
+
+
+@tool(
+    "get_today",
+    parse_docstring=True,
+    description=(
+        "Get today's date and time. Use this for anything date-sensitive "
+        "instead of guessing the current date."
+    ),
+)
+def get_today() -> str:
+    """Return the current local date and time.
+
+    Returns:
+        str: Today's date and time in ISO 8601 format, plus the weekday.
+    """
+    now = datetime.now()
+    return f"{now.isoformat(timespec='seconds')} ({now.strftime('%A')})"
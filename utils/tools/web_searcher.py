@@ -1,4 +1,3 @@
-import json
 import logging
 from typing import List, Dict, Any
 from urllib.parse import quote_plus
@@ -6,6 +5,8 @@ from urllib.parse import quote_plus
 import feedparser
 from langchain.tools import tool
 
+from ..serialization import to_json
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -122,7 +123,7 @@ def web_search(query: str, max_results: int = 5) -> str:
     """
     searcher = FreeWebSearcher()
     result = searcher.search(query, max_results)
-    return json.dumps(result, indent=2)
+    return to_json(result)
 
 
 # ---------------------------------------------------------------------